@@ -0,0 +1,35 @@
+import json
+import os
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from models.profiler_model import ProfilerModel, REPORT_ORDERINGS
+
+
+class Command(BaseCommand):
+    help = "Reports the slowest Supabase calls dumped by every worker to SUPABASE_PROFILE_DIR."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dir", default=settings.SUPABASE_PROFILE_DIR,
+                            help="The directory the profiles were dumped to (default: SUPABASE_PROFILE_DIR).")
+        parser.add_argument("--limit", type=int, default=10, help="The number of call shapes to report.")
+        parser.add_argument("--order-by", choices=REPORT_ORDERINGS, default="avg_ms",
+                            help="The column to sort by, descending.")
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+
+    def handle(self, *args, **options):
+        if not options["dir"] or not os.path.isdir(options["dir"]):
+            raise CommandError("No profile directory; set SUPABASE_PROFILE_DIR or pass --dir.")
+        report = ProfilerModel.load([options["dir"]]).report(limit=options["limit"], order_by=options["order_by"])
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        if not report:
+            self.stdout.write("No Supabase calls recorded.")
+            return
+
+        columns = ("table", "operation", "filter_shape", "count", "errors", "avg_ms", "p95_ms", "max_ms",
+                   "total_ms", "avg_rows", "avg_payload_bytes")
+        rows = [columns] + [tuple(str(summary[column]) for column in columns) for summary in report]
+        widths = [max(len(row[index]) for row in rows) for index in range(len(columns))]
+        for row in rows:
+            self.stdout.write("  ".join(value.ljust(width) for value, width in zip(row, widths)).rstrip())
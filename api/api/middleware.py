@@ -0,0 +1,43 @@
+import time
+import uuid
+import logging
+from helpers.log import request_id_var, upstream_calls_var
+
+access_logger = logging.getLogger("api.access")
+
+
+class RequestLoggingMiddleware:
+    """
+    Assigns every request an id (taken from the X-Request-ID header when present)
+    and writes one structured access log record per request, with the response
+    status, total duration and the time spent in upstream calls.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+        request_id_token = request_id_var.set(request_id)
+        upstream_calls = []
+        upstream_calls_token = upstream_calls_var.set(upstream_calls)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+            response["X-Request-ID"] = request_id
+            duration_ms = round((time.perf_counter() - start) * 1000, 3)
+            access_logger.info(
+                "%s %s %s", request.method, request.path, response.status_code,
+                extra={
+                    "method": request.method,
+                    "path": request.path,
+                    "status_code": response.status_code,
+                    "duration_ms": duration_ms,
+                    "upstream_ms": round(sum(call["duration_ms"] for call in upstream_calls), 3),
+                    "upstream_calls": upstream_calls,
+                },
+            )
+            return response
+        finally:
+            upstream_calls_var.reset(upstream_calls_token)
+            request_id_var.reset(request_id_token)
@@ -0,0 +1,125 @@
+from collections.abc import Mapping
+from django.utils import timezone
+from rest_framework import serializers
+from helpers.helpers import normalise_phone_number, detect_carrier
+
+# CustomerPhoneNo is stored as numeric(12)
+MAX_STORED_PHONE_DIGITS = 12
+
+
+class StrictSerializer(serializers.Serializer):
+    """
+    A serializer that rejects columns it does not declare, so payloads are
+    checked locally instead of failing in Supabase after a round trip.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, Mapping):
+            unknown = [key for key in data if key not in self.fields]
+            if unknown:
+                raise serializers.ValidationError({key: ["Unknown column."] for key in unknown})
+        return super().to_internal_value(data)
+
+
+class StrictIntegerField(serializers.IntegerField):
+    """
+    An integer field that does not coerce strings or floats.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool) or not isinstance(data, int):
+            self.fail("invalid")
+        return super().to_internal_value(data)
+
+
+class PhoneNumberField(serializers.Field):
+    """
+    A phone number, normalised to E.164 (see helpers.normalise_phone_number).
+    """
+
+    default_error_messages = {
+        "too_long": f"Phone number must have at most {MAX_STORED_PHONE_DIGITS} digits.",
+    }
+
+    def to_internal_value(self, data):
+        try:
+            e164 = normalise_phone_number(data)
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
+        if len(e164) - 1 > MAX_STORED_PHONE_DIGITS:
+            self.fail("too_long")
+        return e164
+
+    def to_representation(self, value):
+        return value
+
+
+class CustomerSerializer(StrictSerializer):
+    """
+    Validates rows for the customers table. The phone number is normalised and
+    the computed customerphonee164 and customercarrier columns are filled in;
+    clients cannot set those columns directly.
+    """
+
+    customerfname = serializers.CharField()
+    customerlname = serializers.CharField()
+    customerphoneno = PhoneNumberField()
+
+    def validate(self, attrs):
+        if "customerphoneno" in attrs:
+            e164 = attrs["customerphoneno"]
+            attrs["customerphoneno"] = int(e164[1:])
+            attrs["customerphonee164"] = e164
+            attrs["customercarrier"] = detect_carrier(e164)
+        return attrs
+
+
+class CustomerUpdateSerializer(CustomerSerializer):
+    """
+    Validates PATCH payloads for the customers table: the customerid of the row
+    to update and, as in CustomerSerializer, the columns to change.
+    """
+
+    customerid = StrictIntegerField(min_value=1)
+
+
+class OrderSerializer(StrictSerializer):
+    """
+    Validates rows for the orders table.
+    """
+
+    customerid = StrictIntegerField(min_value=1)
+    orderitem = serializers.CharField()
+    orderamount = StrictIntegerField(min_value=0)
+    orderstatus = serializers.ChoiceField(choices=["Incomplete", "Complete"])
+    ordertime = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        if "ordertime" in attrs:
+            attrs["ordertime"] = attrs["ordertime"].isoformat()
+        return attrs
+
+
+class DeliveryReportSerializer(serializers.Serializer):
+    """
+    Validates SMS delivery reports posted by Africa's Talking and maps them to rows
+    of the sms_delivery_reports table. Fields Africa's Talking may add later are ignored.
+    """
+
+    id = serializers.CharField(max_length=100)
+    status = serializers.CharField(max_length=50)
+    phoneNumber = serializers.CharField(required=False, allow_blank=True)
+    networkCode = serializers.CharField(required=False, allow_blank=True)
+    failureReason = serializers.CharField(required=False, allow_blank=True)
+    retryCount = serializers.IntegerField(required=False, min_value=0)
+
+    def validate(self, attrs):
+        return {
+            "messageid": attrs["id"],
+            "status": attrs["status"],
+            "phonenumber": attrs.get("phoneNumber") or None,
+            "networkcode": attrs.get("networkCode") or None,
+            "failurereason": attrs.get("failureReason") or None,
+            "retrycount": attrs.get("retryCount"),
+            "reportedat": timezone.now().isoformat(),
+        }
@@ -29,7 +29,8 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = 'django-insecure-6eu)g25u-l#*e@&g#z-$c!35km++1m98j1vn&46yofk*or)23+'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# The gunicorn profile (gunicorn.conf.py) sets DJANGO_DEBUG=False.
+DEBUG = os.getenv("DJANGO_DEBUG", "True") == "True"
 
 ALLOWED_HOSTS = ['0.0.0.0', '127.0.0.1', "savannah-informatics-back-end-challenge.onrender.com"]
 
@@ -44,9 +45,11 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework',
+    'api',
 ]
 
 MIDDLEWARE = [
+    'api.middleware.RequestLoggingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -117,6 +120,63 @@ DATABASES = {
 }
 
 
+# Supabase query cache
+# query_records results are cached for SUPABASE_CACHE_TTL seconds (0 disables
+# the cache). SUPABASE_CHANGE_FEED keeps the cache fresh when other services
+# write to Supabase: "realtime" follows Supabase Realtime, a file path replays
+# JSON lines change events from that file. Without a change feed, keep the TTL
+# short.
+
+SUPABASE_CACHE_TTL = float(os.getenv("SUPABASE_CACHE_TTL", "0"))
+SUPABASE_CHANGE_FEED = os.getenv("SUPABASE_CHANGE_FEED", "")
+
+# Supabase read replica
+# Tables listed in SUPABASE_REPLICA_TABLES (e.g. "customers,orders") are copied
+# into the default SQLite database every SUPABASE_REPLICA_INTERVAL seconds, and
+# query_records is served from them for up to SUPABASE_REPLICA_MAX_STALENESS
+# seconds after a sync. Updates and deletes made by other services are picked
+# up by SUPABASE_CHANGE_FEED, or by the full sync every
+# SUPABASE_REPLICA_FULL_SYNC_INTERVAL seconds. Only one worker process syncs
+# at a time, holding a lease in the SQLite database; the others only read.
+
+SUPABASE_REPLICA_TABLES = [table for table in os.getenv("SUPABASE_REPLICA_TABLES", "").split(",") if table]
+SUPABASE_REPLICA_INTERVAL = float(os.getenv("SUPABASE_REPLICA_INTERVAL", "30"))
+SUPABASE_REPLICA_MAX_STALENESS = float(os.getenv("SUPABASE_REPLICA_MAX_STALENESS", "60"))
+SUPABASE_REPLICA_FULL_SYNC_INTERVAL = float(os.getenv("SUPABASE_REPLICA_FULL_SYNC_INTERVAL", "3600"))
+
+# Supabase call profiling
+# With SUPABASE_PROFILING=True, the last SUPABASE_PROFILE_CAPACITY Supabase calls
+# of each process are kept for the slow-query report at /api/admin/slow-queries/.
+# Set SUPABASE_PROFILE_DIR to also dump them there, so that
+# `python manage.py supabase_slow_queries` can merge every worker's calls.
+
+SUPABASE_PROFILING = os.getenv("SUPABASE_PROFILING", "False") == "True"
+SUPABASE_PROFILE_CAPACITY = int(os.getenv("SUPABASE_PROFILE_CAPACITY", "1000"))
+SUPABASE_PROFILE_DIR = os.getenv("SUPABASE_PROFILE_DIR", "")
+
+# SMS delivery reports
+# Africa's Talking delivery reports posted to /api/sms/callbacks/ are buffered
+# and upserted into sms_delivery_reports in batches of up to
+# SMS_REPORT_BATCH_SIZE, at least every SMS_REPORT_FLUSH_INTERVAL seconds. At
+# most SMS_REPORT_MAX_BUFFERED reports are held per process; beyond that the
+# callback is answered with 503 so Africa's Talking retries it. The callback
+# URL must carry ?token=<SMS_CALLBACK_TOKEN>; without a token, callbacks are
+# only accepted when DEBUG is on.
+
+SMS_REPORT_BATCH_SIZE = int(os.getenv("SMS_REPORT_BATCH_SIZE", "500"))
+SMS_REPORT_FLUSH_INTERVAL = float(os.getenv("SMS_REPORT_FLUSH_INTERVAL", "1"))
+SMS_REPORT_MAX_BUFFERED = int(os.getenv("SMS_REPORT_MAX_BUFFERED", "10000"))
+SMS_CALLBACK_TOKEN = os.getenv("SMS_CALLBACK_TOKEN", "")
+
+
+# Seconds an upstream call made through helpers.concurrency.fan_out may take
+UPSTREAM_CALL_TIMEOUT = float(os.getenv("UPSTREAM_CALL_TIMEOUT", "10"))
+
+# SMS a single order request may send at once, so a bulk order cannot take
+# over the shared fan_out pool (FAN_OUT_WORKERS threads) from other requests
+ORDER_SMS_CONCURRENCY = int(os.getenv("ORDER_SMS_CONCURRENCY", "4"))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -153,6 +213,47 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Logging
+# Structured JSON logs are written to stdout from a background thread. Only a
+# sample of successful requests is access logged; errors are always logged.
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+ACCESS_LOG_SAMPLE_RATE = float(os.getenv("ACCESS_LOG_SAMPLE_RATE", "1.0" if DEBUG else "0.1"))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {
+            '()': 'helpers.log.JsonFormatter',
+        },
+    },
+    'filters': {
+        'sample_success': {
+            '()': 'helpers.log.SamplingFilter',
+            'rate': ACCESS_LOG_SAMPLE_RATE,
+        },
+    },
+    'handlers': {
+        'queue': {
+            'class': 'helpers.log.QueueStreamHandler',
+            'formatter': 'json',
+        },
+    },
+    'loggers': {
+        'api.access': {
+            'handlers': ['queue'],
+            'filters': ['sample_success'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+    'root': {
+        'handlers': ['queue'],
+        'level': LOG_LEVEL,
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
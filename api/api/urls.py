@@ -16,7 +16,7 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path
-from api.views import IndexView, CustomerView, OrderView
+from api.views import IndexView, CustomerView, OrderView, SlowQueryView, DeliveryReportView, DeliveryReportStatsView
 
 urlpatterns = [
     # Admin route
@@ -27,5 +27,10 @@ urlpatterns = [
     # Customer routes
     path('api/customers/', CustomerView.as_view(), name='customer'),
     # Order routes
-    path('api/orders/', OrderView.as_view(), name='order')
+    path('api/orders/', OrderView.as_view(), name='order'),
+    # SMS routes
+    path('api/sms/callbacks/', DeliveryReportView.as_view(), name='sms-callbacks'),
+    # Admin routes
+    path('api/admin/slow-queries/', SlowQueryView.as_view(), name='slow-queries'),
+    path('api/admin/sms-callbacks/', DeliveryReportStatsView.as_view(), name='sms-callback-stats'),
 ]
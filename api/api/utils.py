@@ -4,6 +4,7 @@ import jwt
 import requests
 from django.contrib.auth import authenticate
 from dotenv import load_dotenv
+from helpers.log import upstream_call
 
 
 # Load environment variables from .env file
@@ -19,7 +20,8 @@ def jwt_get_username_from_payload_handler(payload):
 def jwt_decode_token(token):
     # API Domain
     header = jwt.get_unverified_header(token)
-    jwks = requests.get('https://{}/.well-known/jwks.json'.format(auth0_domain)).json()
+    with upstream_call("auth0", "jwks"):
+        jwks = requests.get('https://{}/.well-known/jwks.json'.format(auth0_domain)).json()
     # jwks = requests.get('https://{}/.well-known/jwks.json'.format(auth0_domain)).json()
     public_key = None
     for jwk in jwks['keys']:
@@ -1,21 +1,75 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
+from django.conf import settings
 from models.supabase_model import SupabaseModel
 from models.africastalking_model import AfricastalkingModel
+from models.cache_model import QueryCacheModel
+from models.replica_model import ReplicaModel
+from models.change_feed_model import create_change_feed_model
+from models.profiler_model import ProfilerModel, REPORT_ORDERINGS
+from models.delivery_report_model import DeliveryReportModel
 from helpers.helpers import generate_africastalking_message
+from helpers.concurrency import fan_out
+from api.serializers import CustomerSerializer, CustomerUpdateSerializer, OrderSerializer, DeliveryReportSerializer
 from django.http import HttpResponseRedirect
 import jwt
-from functools import wraps
+import hmac
+import logging
+from functools import wraps, partial
 from django.http import JsonResponse
 
+logger = logging.getLogger(__name__)
+
+# Initialize the query cache
+query_cache = QueryCacheModel(ttl=settings.SUPABASE_CACHE_TTL) if settings.SUPABASE_CACHE_TTL > 0 else None
+
+# Initialize the Supabase call profiler
+profiler_model = None
+if settings.SUPABASE_PROFILING:
+    profiler_model = ProfilerModel(capacity=settings.SUPABASE_PROFILE_CAPACITY, dump_dir=settings.SUPABASE_PROFILE_DIR or None)
+
 # Initialize the SupabaseModel
-supabase_model = SupabaseModel()
+supabase_model = SupabaseModel(cache=query_cache, profiler=profiler_model)
+
+# Initialize the local read replica, which syncs through the SupabaseModel in
+# whichever worker process holds its sync lease
+replica_model = None
+if settings.SUPABASE_REPLICA_TABLES:
+    replica_model = ReplicaModel(
+        supabase_model.fetch_records,
+        settings.DATABASES['default']['NAME'],
+        tables=settings.SUPABASE_REPLICA_TABLES,
+        interval=settings.SUPABASE_REPLICA_INTERVAL,
+        max_staleness=settings.SUPABASE_REPLICA_MAX_STALENESS,
+        full_sync_interval=settings.SUPABASE_REPLICA_FULL_SYNC_INTERVAL,
+    )
+    supabase_model.replica = replica_model
+    replica_model.start()
+
+# Initialize the change feed that keeps the cache and the replica fresh
+change_feed_listeners = [listener for listener in (query_cache, replica_model) if listener is not None]
+change_feed_model = None
+if change_feed_listeners:
+    change_feed_model = create_change_feed_model(settings.SUPABASE_CHANGE_FEED, change_feed_listeners)
+if change_feed_model:
+    change_feed_model.start()
 
 # Initialize the AfricastalkingModel
 africastalking_model = AfricastalkingModel()
 
+# Initialize the buffer that writes SMS delivery reports to Supabase in batches
+delivery_report_model = DeliveryReportModel(
+    supabase_model.upsert_record,
+    batch_size=settings.SMS_REPORT_BATCH_SIZE,
+    flush_interval=settings.SMS_REPORT_FLUSH_INTERVAL,
+    max_buffered=settings.SMS_REPORT_MAX_BUFFERED,
+)
+delivery_report_model.start()
+if not settings.SMS_CALLBACK_TOKEN and not settings.DEBUG:
+    logger.warning("SMS_CALLBACK_TOKEN is not set, SMS delivery report callbacks will be rejected")
+
 
 def get_token_auth_header(request):
     auth = request.META.get("HTTP_AUTHORIZATION", None)
@@ -44,6 +98,7 @@ def requires_scope(required_scope):
                 response.status_code = 403
                 return response
             except Exception as e:
+                logger.warning("Scope check for %s failed: %s", required_scope, e)
                 response = JsonResponse({'error': str(e)})
                 response.status_code = 403
                 return response
@@ -63,6 +118,7 @@ class IndexView(APIView):
             redirect_url = "https://documenter.getpostman.com/view/21896699/2sAXqv4LN1"
             return HttpResponseRedirect(redirect_url)
         except Exception as e:
+            logger.exception("Error redirecting to the API documentation")
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
@@ -81,18 +137,25 @@ class CustomerView(APIView):
             data = supabase_model.query_records('customers')
             return Response(data, status=status.HTTP_200_OK)
         except Exception as e:
+            logger.exception("Error retrieving customers")
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     @requires_scope('write:customer')
     def post(self, request):
         """
-        POST request to add a new customer.
+        POST request to add a new customer, or a list of customers.
         """
         try:
-            customer_data = request.data
+            many = isinstance(request.data, list)
+            serializer = CustomerSerializer(data=request.data, many=many, **({"allow_empty": False} if many else {}))
+            if not serializer.is_valid():
+                return Response({"error": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+            customer_data = [dict(customer) for customer in serializer.validated_data] if many else dict(serializer.validated_data)
             response = supabase_model.insert_record('customers', customer_data)
             return Response(response, status=status.HTTP_201_CREATED)
         except Exception as e:
+            logger.exception("Error creating customer")
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     @requires_scope('write:customer')
@@ -101,19 +164,55 @@ class CustomerView(APIView):
         PATCH request to update a customer record.
         """
         try:
-            new_customer_data = request.data
+            new_customer_data = dict(request.data)
 
             if "customerid" not in new_customer_data:
                 return Response({"error": "Missing customerid!"}, status=status.HTTP_400_BAD_REQUEST)
 
-            filters = {'customerid': ('eq', new_customer_data.pop("customerid"))}
-            response = supabase_model.update_record('customers', new_customer_data, filters)
+            serializer = CustomerUpdateSerializer(data=new_customer_data, partial=True)
+            if not serializer.is_valid():
+                return Response({"error": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+            update_data = dict(serializer.validated_data)
+            filters = {'customerid': ('eq', update_data.pop("customerid"))}
+            if not update_data:
+                return Response({"error": "No columns to update!"}, status=status.HTTP_400_BAD_REQUEST)
+
+            response = supabase_model.update_record('customers', update_data, filters)
 
             return Response(response, status=status.HTTP_200_OK)
         except Exception as e:
+            logger.exception("Error updating customer")
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def send_order_sms(sms_calls: list) -> list:
+    """
+    Sends order SMS, at most ORDER_SMS_CONCURRENCY at a time. Once a batch times
+    out, the SMS gateway is taken to be unavailable and the rest are not sent.
+
+    Parameters:
+        sms_calls (list): Zero-argument calls to AfricastalkingModel.send_sms.
+
+    Returns:
+        list: None for each SMS sent, or the reason it was not sent.
+    """
+    errors, timed_out = [], False
+    for start in range(0, len(sms_calls), settings.ORDER_SMS_CONCURRENCY):
+        batch = sms_calls[start:start + settings.ORDER_SMS_CONCURRENCY]
+        if timed_out:
+            errors.extend("Not sent, the SMS gateway timed out." for _ in batch)
+            continue
+        for result in fan_out(*batch, timeout=settings.UPSTREAM_CALL_TIMEOUT, return_exceptions=True):
+            timed_out = timed_out or isinstance(result, TimeoutError)
+            if isinstance(result, Exception):
+                errors.append(str(result))
+            elif isinstance(result, dict) and "error" in result:
+                errors.append(result["error"])
+            else:
+                errors.append(None)
+    return errors
+
+
 # Class-based view for handling order requests
 class OrderView(APIView):
     def get_permissions(self):
@@ -129,30 +228,119 @@ class OrderView(APIView):
             data = supabase_model.query_records('orders')
             return Response(data, status=status.HTTP_200_OK)
         except Exception as e:
+            logger.exception("Error retrieving orders")
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     @requires_scope('write:order')
     def post(self, request):
         """
-        POST request to add a new order and notify the customer via SMS.
+        POST request to add a new order, or a list of orders, and notify the customers via SMS.
         """
         try:
-            order_data = request.data
-            response = supabase_model.insert_record('orders', order_data)
+            many = isinstance(request.data, list)
+            serializer = OrderSerializer(data=request.data, many=many, **({"allow_empty": False} if many else {}))
+            if not serializer.is_valid():
+                return Response({"error": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+            order_data = [dict(order) for order in serializer.validated_data] if many else dict(serializer.validated_data)
+            customer_ids = sorted({order["customerid"] for order in (order_data if many else [order_data])})
+            customer_filters = {"customerid": ("in", customer_ids) if many else ("eq", customer_ids[0])}
 
-            customer_data = supabase_model.query_records('customers', {"customerid": ("eq", order_data["customerid"])})
-            if not customer_data:
+            # The customerid foreign key makes the insert fail for unknown customers,
+            # so the customer lookup does not need to wait for it
+            response, customer_data = fan_out(
+                partial(supabase_model.insert_record, 'orders', order_data),
+                partial(supabase_model.query_records, 'customers', customer_filters),
+                timeout=settings.UPSTREAM_CALL_TIMEOUT,
+            )
+            customers = {customer["customerid"]: customer for customer in customer_data}
+            if any(customer_id not in customers for customer_id in customer_ids):
                 return Response({"error": "Customer not found!"}, status=status.HTTP_400_BAD_REQUEST)
 
-            at_data = {
-                "message": generate_africastalking_message(response[0], customer_data[0]),
-                "recipients": [f"+{customer_data[0]['customerphoneno']}"],
-            }
+            sms_calls = []
+            for order in response:
+                customer = customers[order["customerid"]]
+                at_data = {
+                    "message": generate_africastalking_message(order, customer),
+                    "recipients": [
+                        # Customers created before customerphonee164 existed only have the number
+                        customer.get("customerphonee164") or f"+{int(customer['customerphoneno'])}"
+                    ],
+                }
+                sms_calls.append(partial(africastalking_model.send_sms, **at_data))
 
-            africastalking_model.send_sms(message=at_data["message"], recipients=at_data["recipients"])
+                order["message"] = at_data["message"]
+                order["recipients"] = at_data["recipients"]
 
-            response[0]["message"] = at_data["message"]
-            response[0]["recipients"] = at_data["recipients"]
+            # The orders are already created, so SMS failures are reported per order
+            # rather than failing the request
+            for order, error in zip(response, send_order_sms(sms_calls)):
+                order["sms_sent"] = error is None
+                if error is not None:
+                    order["sms_error"] = error
+                    logger.warning("Order SMS to %s not sent: %s", order["recipients"], error)
             return Response(response, status=status.HTTP_201_CREATED)
         except Exception as e:
+            logger.exception("Error creating order")
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# Class-based view for the Supabase slow-query report
+class SlowQueryView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        """
+        GET request to retrieve the slowest Supabase calls recorded by this worker process.
+        Accepts the optional query parameters limit (default 10) and order_by (default avg_ms).
+        """
+        if profiler_model is None:
+            return Response({"error": "Supabase profiling is disabled!"}, status=status.HTTP_404_NOT_FOUND)
+        order_by = request.query_params.get("order_by", "avg_ms")
+        if order_by not in REPORT_ORDERINGS:
+            return Response({"error": f"order_by must be one of {', '.join(REPORT_ORDERINGS)}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = int(request.query_params.get("limit", "10"))
+        except ValueError:
+            return Response({"error": "limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(profiler_model.report(limit=limit, order_by=order_by), status=status.HTTP_200_OK)
+
+
+# Class-based view for Africa's Talking SMS delivery report callbacks
+class DeliveryReportView(APIView):
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def post(self, request):
+        """
+        POST request from Africa's Talking with an SMS delivery report. The report is
+        buffered and written to Supabase in the background, so the callback is
+        acknowledged without waiting for the database.
+        """
+        if not settings.SMS_CALLBACK_TOKEN:
+            # Without a token anyone could overwrite delivery statuses or fill the buffer
+            if not settings.DEBUG:
+                return Response({"error": "SMS callbacks are disabled until SMS_CALLBACK_TOKEN is set!"},
+                                status=status.HTTP_403_FORBIDDEN)
+        elif not hmac.compare_digest(request.query_params.get("token", ""), settings.SMS_CALLBACK_TOKEN):
+            return Response({"error": "Invalid callback token!"}, status=status.HTTP_403_FORBIDDEN)
+
+        serializer = DeliveryReportSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response({"error": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+        if not delivery_report_model.add(serializer.validated_data):
+            logger.warning("Delivery report buffer is full, rejecting report %s", serializer.validated_data["messageid"])
+            return Response({"error": "Too many delivery reports, retry later."}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return Response({"status": "accepted"}, status=status.HTTP_200_OK)
+
+
+# Class-based view for SMS delivery report ingestion statistics
+class DeliveryReportStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        """
+        GET request to retrieve the delivery report ingestion counters and throughput of this worker process.
+        """
+        return Response(delivery_report_model.stats(), status=status.HTTP_200_OK)
@@ -0,0 +1,65 @@
+"""
+Measures SMS delivery report ingestion: validating each callback and writing
+it with one Supabase upsert, against buffering it in a DeliveryReportModel
+that upserts in batches. Supabase is replaced by a stub that sleeps for a
+fixed round trip latency.
+
+Usage:
+    python -m benchmarks.bench_delivery_reports [callbacks] [latency_ms]
+"""
+import os
+import sys
+import time
+import logging
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "api.settings")
+django.setup()
+
+from api.serializers import DeliveryReportSerializer
+from models.delivery_report_model import DeliveryReportModel
+
+
+def callbacks(count):
+    for i in range(count):
+        yield {"id": f"ATXid_{i % (count // 2 or 1)}", "status": "Success", "phoneNumber": "+254712345678",
+               "networkCode": "63902", "retryCount": "0"}
+
+
+def run(label, ingest, count, finish=None):
+    upserts_before = upserts[0]
+    start = time.perf_counter()
+    for data in callbacks(count):
+        serializer = DeliveryReportSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        ingest(serializer.validated_data)
+    acknowledged = time.perf_counter() - start
+    if finish:
+        finish()
+    written = time.perf_counter() - start
+    print(f"{label:<28} {count / acknowledged:>10,.0f} callbacks/s acknowledged "
+          f"{count / written:>10,.0f} callbacks/s written {upserts[0] - upserts_before:>6} upserts")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 5) / 1000
+    logging.getLogger("models.delivery_report_model").setLevel(logging.WARNING)
+
+    def upsert(table_name, rows):
+        upserts[0] += 1
+        time.sleep(latency)
+        return rows
+
+    run("one upsert per callback", lambda report: upsert("sms_delivery_reports", [report]), count)
+
+    model = DeliveryReportModel(upsert, batch_size=500, flush_interval=1)
+    model.start()
+    run("buffered (batch_size 500)", model.add, count, model.stop)
+    print(model.stats())
+
+
+upserts = [0]
+
+if __name__ == "__main__":
+    main()
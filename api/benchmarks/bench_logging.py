@@ -0,0 +1,67 @@
+"""
+Measures the overhead of the request logging pipeline by pushing requests
+through RequestLoggingMiddleware with a stub view, comparing a NullHandler,
+a synchronous StreamHandler and the QueueStreamHandler at different access
+log sample rates.
+
+Usage:
+    python -m benchmarks.bench_logging [requests]
+"""
+import os
+import sys
+import time
+import logging
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "api.settings")
+django.setup()
+
+from django.http import HttpResponse
+from django.test import RequestFactory
+from api.middleware import RequestLoggingMiddleware
+from helpers.log import JsonFormatter, SamplingFilter, QueueStreamHandler, upstream_call
+
+
+def stub_view(request):
+    with upstream_call("supabase", "query:customers"):
+        pass
+    return HttpResponse("[]", content_type="application/json")
+
+
+def run(label, handler, rate, requests):
+    access_logger = logging.getLogger("api.access")
+    access_logger.handlers = [handler] if handler else []
+    access_logger.filters = [SamplingFilter(rate)]
+    access_logger.propagate = False
+    middleware = RequestLoggingMiddleware(stub_view) if handler else stub_view
+    factory = RequestFactory()
+    request = factory.get("/api/customers/")
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        middleware(request)
+    elapsed = time.perf_counter() - start
+    if handler:
+        handler.flush()
+    print(f"{label:<44} {requests / elapsed:>12,.0f} req/s {elapsed / requests * 1e6:>8.1f} us/req")
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    devnull = open(os.devnull, "w")
+
+    stream_handler = logging.StreamHandler(devnull)
+    stream_handler.setFormatter(JsonFormatter())
+    queue_handler = QueueStreamHandler(stream=devnull)
+    queue_handler.setFormatter(JsonFormatter())
+
+    run("no middleware", None, 1.0, requests)
+    run("middleware + NullHandler", logging.NullHandler(), 1.0, requests)
+    run("middleware + StreamHandler (rate 1.0)", stream_handler, 1.0, requests)
+    run("middleware + QueueStreamHandler (rate 1.0)", queue_handler, 1.0, requests)
+    run("middleware + QueueStreamHandler (rate 0.1)", queue_handler, 0.1, requests)
+    queue_handler.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Measures how many rows per second the request serializers validate, for
+batches of orders and customers as posted to /api/orders/ and
+/api/customers/.
+
+Usage:
+    python -m benchmarks.bench_serializers [rows]
+"""
+import os
+import sys
+import time
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "api.settings")
+django.setup()
+
+from api.serializers import CustomerSerializer, OrderSerializer
+
+
+def run(label, serializer_class, rows):
+    start = time.perf_counter()
+    serializer = serializer_class(data=rows, many=True)
+    assert serializer.is_valid(), serializer.errors
+    elapsed = time.perf_counter() - start
+    print(f"{label:<12} {len(rows) / elapsed:>12,.0f} rows/s {elapsed / len(rows) * 1e6:>8.1f} us/row")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    run("orders", OrderSerializer, [
+        {"customerid": i + 1, "orderitem": "Boards", "orderamount": 10, "orderstatus": "Incomplete",
+         "ordertime": "2024-09-18T07:26:11Z"}
+        for i in range(count)
+    ])
+    run("customers", CustomerSerializer, [
+        {"customerfname": "Jane", "customerlname": "Doe", "customerphoneno": f"07{i % 100000000:08d}"}
+        for i in range(count)
+    ])
+
+
+if __name__ == "__main__":
+    main()
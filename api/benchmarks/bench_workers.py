@@ -0,0 +1,87 @@
+"""
+Compares the gunicorn worker models of gunicorn.conf.py by serving GET /
+(a redirect with no upstream calls, so no Supabase or Africa's Talking
+credentials are used) and measuring requests per second over keep-alive
+connections.
+
+Usage:
+    python -m benchmarks.bench_workers [requests] [concurrency]
+"""
+import os
+import sys
+import time
+import socket
+import subprocess
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PORT = 8765
+
+
+def wait_until_listening(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("gunicorn did not start")
+
+
+def client(requests):
+    connection = http.client.HTTPConnection("127.0.0.1", PORT)
+    completed = 0
+    while completed < requests:
+        try:
+            connection.request("GET", "/")
+            response = connection.getresponse()
+            response.read()
+        except (http.client.RemoteDisconnected, ConnectionError):
+            # Workers recycled by max_requests close their connections
+            connection.close()
+            continue
+        if response.status != 302:
+            raise RuntimeError(f"Unexpected status {response.status}")
+        completed += 1
+    connection.close()
+
+
+def run(label, env, requests, concurrency):
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn"],
+        cwd=API_DIR,
+        env={**os.environ, "PORT": str(PORT), "ACCESS_LOG_SAMPLE_RATE": "0", **env},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_until_listening(PORT)
+        # Warm up every worker
+        with ThreadPoolExecutor(concurrency) as pool:
+            list(pool.map(client, [50] * concurrency))
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            list(pool.map(client, [requests // concurrency] * concurrency))
+        elapsed = time.perf_counter() - start
+        total = requests // concurrency * concurrency
+        print(f"{label:<36} {total / elapsed:>10,.0f} req/s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    print(f"{os.cpu_count()} CPUs, {requests} requests, {concurrency} connections")
+    run("gthread (config defaults)", {"GUNICORN_WORKER_MODEL": "gthread"}, requests, concurrency)
+    run("uvicorn (config defaults)", {"GUNICORN_WORKER_MODEL": "uvicorn"}, requests, concurrency)
+    run("gthread, 1 thread, DEBUG=True", {"GUNICORN_WORKER_MODEL": "gthread", "GUNICORN_THREADS": "1",
+                                        "DJANGO_DEBUG": "True"}, requests, concurrency)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import os
+import time
+import asyncio
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+# Upper bound on upstream calls running at once per process
+FAN_OUT_WORKERS = int(os.getenv("FAN_OUT_WORKERS", "16"))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Returns the thread pool shared by fan_out and afan_out, creating it on first use.
+
+    Returns:
+        ThreadPoolExecutor: The shared thread pool.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=FAN_OUT_WORKERS, thread_name_prefix="fan-out")
+    return _executor
+
+
+def _timeouts(timeout, count: int) -> list:
+    if timeout is None or isinstance(timeout, (int, float)):
+        return [timeout] * count
+    timeouts = list(timeout)
+    if len(timeouts) != count:
+        raise ValueError(f"Expected {count} timeouts, got {len(timeouts)}.")
+    return timeouts
+
+
+def fan_out(*calls, timeout=None, return_exceptions: bool = False) -> list:
+    """
+    Runs independent calls concurrently on the shared thread pool and returns
+    their results in order. The caller's context (request id, upstream call
+    timings) is copied into each call.
+
+    If a call fails or times out, calls that have not started yet are cancelled
+    and the error is raised. Calls that are already running cannot be
+    interrupted; their results are discarded.
+
+    Parameters:
+        *calls (callable): Zero-argument callables, e.g. functools.partial objects.
+        timeout (float | list): Seconds each call may take, as one value for all
+            calls or one value per call. None waits indefinitely.
+        return_exceptions (bool): Whether to return the error of a failed or timed
+            out call in its place instead of raising it. A timed out call that has
+            not started is cancelled; the other calls carry on.
+
+    Returns:
+        list: The result of each call.
+
+    Raises:
+        TimeoutError: If a call does not finish within its timeout.
+        Exception: The first error raised by a call.
+    """
+    timeouts = _timeouts(timeout, len(calls))
+    executor = get_executor()
+    start = time.monotonic()
+    futures = [executor.submit(contextvars.copy_context().run, call) for call in calls]
+    try:
+        results = []
+        for index, (future, call_timeout) in enumerate(zip(futures, timeouts)):
+            remaining = None if call_timeout is None else max(0, start + call_timeout - time.monotonic())
+            try:
+                results.append(future.result(timeout=remaining))
+            except FutureTimeoutError as e:
+                if future.done():
+                    if not return_exceptions:
+                        raise
+                    results.append(e)
+                    continue
+                error = TimeoutError(f"Call {index} did not finish within {call_timeout}s.")
+                if not return_exceptions:
+                    raise error from e
+                future.cancel()
+                results.append(error)
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                results.append(e)
+        return results
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        raise
+
+
+async def afan_out(*calls, timeout=None) -> list:
+    """
+    The asyncio counterpart of fan_out for ASGI code. Coroutine functions are
+    awaited on the running loop, and other callables run on the shared thread
+    pool. Results are gathered in order, and on the first error or timeout the
+    remaining calls are cancelled.
+
+    Parameters:
+        *calls (callable): Zero-argument callables or coroutine functions.
+        timeout (float | list): Seconds each call may take, as one value for all
+            calls or one value per call. None waits indefinitely.
+
+    Returns:
+        list: The result of each call.
+
+    Raises:
+        TimeoutError: If a call does not finish within its timeout.
+        Exception: The first error raised by a call.
+    """
+    timeouts = _timeouts(timeout, len(calls))
+    loop = asyncio.get_running_loop()
+
+    async def run(index, call, call_timeout):
+        if asyncio.iscoroutinefunction(call):
+            awaitable = call()
+        else:
+            awaitable = loop.run_in_executor(get_executor(), contextvars.copy_context().run, call)
+        try:
+            return await asyncio.wait_for(awaitable, call_timeout)
+        except asyncio.TimeoutError as e:
+            raise TimeoutError(f"Call {index} did not finish within {call_timeout}s.") from e
+
+    tasks = [asyncio.ensure_future(run(index, call, call_timeout))
+             for index, (call, call_timeout) in enumerate(zip(calls, timeouts))]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+def _reset_executor():
+    # Pool threads do not survive a fork; children create their own pool
+    global _executor, _executor_lock
+    _executor = None
+    _executor_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_executor)
@@ -1,3 +1,8 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+
 def generate_africastalking_message(order_data: dict, customer_data: dict) -> str:
     """
     Generates a message for the customer based on their order details.
@@ -18,10 +23,7 @@ def generate_africastalking_message(order_data: dict, customer_data: dict) -> st
         KeyError: If any required keys are missing from the input dictionaries.
     """
     try:
-        print("Customer data in helpers: ")
-        print(customer_data)
-        print("Order data in helpers: ")
-        print(order_data)
+        logger.debug("Generating message for customer %s and order %s", customer_data, order_data)
         message = (
             f"Hello {customer_data['customerfname']} {customer_data['customerlname']}.\n"
             f"Your order (OrderID: {order_data['orderid']}) of {order_data['orderamount']}, "
@@ -31,3 +33,107 @@ def generate_africastalking_message(order_data: dict, customer_data: dict) -> st
     except KeyError as e:
         raise KeyError(f"Missing key in input data: {e}")
 
+
+
+# Kenyan mobile prefixes (the three digits following the 254 country code)
+# mapped to the carrier that owns them. Expanded once at import time so that
+# carrier detection is a single dictionary lookup.
+_KE_CARRIER_PREFIX_RANGES = {
+    "Safaricom": [(110, 115), (700, 729), (740, 743), (745, 746), (748, 748),
+                  (757, 759), (768, 769), (790, 799)],
+    "Airtel": [(100, 102), (730, 739), (750, 756), (762, 762), (780, 789)],
+    "Telkom": [(770, 779)],
+    "Equitel": [(763, 766)],
+    "Faiba": [(747, 747)],
+}
+KE_CARRIER_PREFIXES = {
+    str(prefix): carrier
+    for carrier, ranges in _KE_CARRIER_PREFIX_RANGES.items()
+    for start, end in ranges
+    for prefix in range(start, end + 1)
+}
+
+
+def normalise_phone_number(phone_number) -> str:
+    """
+    Normalises a phone number to E.164 format. Numbers without a country code
+    are assumed to be Kenyan (e.g. 0712345678, 712345678, 254712345678 and
+    +254 712 345 678 all normalise to +254712345678).
+
+    Parameters:
+        phone_number (int | str): The raw phone number.
+
+    Returns:
+        str: The phone number in E.164 format.
+
+    Raises:
+        ValueError: If the phone number is not a valid E.164 or Kenyan mobile number,
+            or is not given as an integer or string. Kenyan mobile numbers are checked by
+            length and leading digit only, so prefixes missing from KE_CARRIER_PREFIXES pass.
+    """
+    if isinstance(phone_number, bool) or not isinstance(phone_number, (int, str)):
+        raise ValueError(f"Phone number must be an integer or string: {phone_number!r}")
+
+    raw = str(phone_number).strip()
+    digits = "".join(char for char in raw if char.isdigit())
+    international = raw.startswith("+") or digits.startswith("00")
+    if digits.startswith("00"):
+        digits = digits[2:]
+
+    if not international:
+        if len(digits) == 10 and digits.startswith("0"):
+            digits = "254" + digits[1:]
+        elif len(digits) == 9 and digits[0] in "17":
+            digits = "254" + digits
+
+    if digits.startswith("254"):
+        if len(digits) != 12 or digits[3] not in "17":
+            raise ValueError(f"Invalid Kenyan mobile number: {phone_number}")
+    elif not 8 <= len(digits) <= 15 or digits.startswith("0"):
+        raise ValueError(f"Invalid phone number: {phone_number}")
+
+    return f"+{digits}"
+
+
+def detect_carrier(phone_number):
+    """
+    Detects the Kenyan mobile carrier of a phone number from its prefix. The
+    carrier is informational: numbers with unknown prefixes are still valid.
+
+    Parameters:
+        phone_number (int | str): The phone number, in any format accepted by normalise_phone_number.
+
+    Returns:
+        str | None: The carrier name, or None for non-Kenyan numbers and unknown prefixes.
+
+    Raises:
+        ValueError: If the phone number is invalid.
+    """
+    e164 = normalise_phone_number(phone_number)
+    if not e164.startswith("+254"):
+        return None
+    return KE_CARRIER_PREFIXES.get(e164[4:7])
+
+
+def dedupe_recipients(recipients: list) -> list:
+    """
+    Normalises a batch of SMS recipients and drops repeated handsets, so that
+    each number is sent to at most once per batch. The original order is kept.
+
+    Parameters:
+        recipients (list): Phone numbers in any format accepted by normalise_phone_number.
+
+    Returns:
+        list: The unique recipients in E.164 format.
+
+    Raises:
+        ValueError: If any recipient is not a valid phone number.
+    """
+    seen = set()
+    unique = []
+    for recipient in recipients:
+        e164 = normalise_phone_number(recipient)
+        if e164 not in seen:
+            seen.add(e164)
+            unique.append(e164)
+    return unique
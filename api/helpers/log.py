@@ -0,0 +1,209 @@
+import os
+import sys
+import json
+import copy
+import time
+import atexit
+import random
+import logging
+import weakref
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from queue import Queue
+from logging.handlers import QueueHandler
+
+logger = logging.getLogger(__name__)
+
+# Per-request context, set by api.middleware.RequestLoggingMiddleware
+request_id_var = ContextVar("request_id", default=None)
+upstream_calls_var = ContextVar("upstream_calls", default=None)
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName", "request_id"}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats log records as single-line JSON objects. Values passed through
+    `extra` are included as top-level keys.
+    """
+
+    def format(self, record):
+        """
+        Formats a log record as JSON.
+
+        Parameters:
+            record (LogRecord): The record to format.
+
+        Returns:
+            str: The JSON encoded record.
+        """
+        entry = {
+            "time": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None) or request_id_var.get()
+        if request_id:
+            entry["request_id"] = request_id
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and key not in entry:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps only a fraction of successful access log records. Warnings, errors
+    and records with a status code of 400 or above are always kept.
+    """
+
+    def __init__(self, rate: float = 1.0):
+        """
+        Parameters:
+            rate (float): The fraction of successful records to keep, between 0 and 1.
+        """
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or getattr(record, "status_code", 0) >= 400:
+            return True
+        return self.rate >= 1 or random.random() < self.rate
+
+
+class QueueStreamHandler(QueueHandler):
+    """
+    A logging handler that hands records to a background thread which formats
+    them and writes them to a stream (stdout by default), so logging never
+    blocks request threads on I/O.
+
+    The background thread is restarted in forked children, as threads do
+    not survive a fork (e.g. gunicorn workers with preload_app).
+    """
+
+    def __init__(self, stream=None):
+        """
+        Parameters:
+            stream (file): The stream the background thread writes to. Defaults to stdout.
+        """
+        super().__init__(Queue())
+        self.target = logging.StreamHandler(stream or sys.stdout)
+        self._closed = False
+        self._start_thread()
+        _open_handlers.add(self)
+
+    def _start_thread(self):
+        self._thread = threading.Thread(target=self._write_records, name="QueueStreamHandler", daemon=True)
+        self._thread.start()
+
+    def _write_records(self):
+        queue = self.queue
+        while True:
+            record = queue.get()
+            try:
+                if record is _STOP:
+                    return
+                self.target.handle(record)
+            finally:
+                queue.task_done()
+
+    def _after_fork(self):
+        # Records queued by the parent belong to the parent
+        if not self._closed:
+            self.queue = Queue()
+            self._start_thread()
+
+    def setFormatter(self, fmt):
+        # Formatting happens on the background thread
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        """
+        Prepares a record for the queue without formatting it, only resolving
+        the message, the request id and any traceback while still on the
+        logging thread.
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if not getattr(record, "request_id", None):
+            record.request_id = request_id_var.get()
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def flush(self):
+        """
+        Waits until all queued records have been written.
+        """
+        if not self._closed:
+            self.queue.join()
+        self.target.flush()
+
+    def close(self):
+        """
+        Writes any queued records and stops the background thread.
+        """
+        with self.lock:
+            if self._closed:
+                return
+            self._closed = True
+        _open_handlers.discard(self)
+        self.queue.put(_STOP)
+        self._thread.join()
+        try:
+            self.target.flush()
+        except (OSError, ValueError):
+            # The stream may already be closed at interpreter exit
+            pass
+        super().close()
+
+
+_STOP = object()
+_open_handlers = weakref.WeakSet()
+
+
+def _close_handlers():
+    for handler in list(_open_handlers):
+        handler.close()
+
+
+def _restart_handlers():
+    for handler in list(_open_handlers):
+        handler._after_fork()
+
+
+atexit.register(_close_handlers)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_handlers)
+
+
+@contextmanager
+def upstream_call(service: str, operation: str):
+    """
+    Times a call to an upstream service. The duration is logged at debug level
+    and added to the current request's upstream calls for the access log.
+
+    Parameters:
+        service (str): The upstream service, e.g. "supabase".
+        operation (str): The operation performed, e.g. "query:customers".
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration_ms = round((time.perf_counter() - start) * 1000, 3)
+        calls = upstream_calls_var.get()
+        if calls is not None:
+            calls.append({"service": service, "operation": operation, "duration_ms": duration_ms})
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("%s %s took %sms", service, operation, duration_ms,
+                         extra={"service": service, "operation": operation, "duration_ms": duration_ms})
@@ -15,6 +15,9 @@ def main():
             "available on your PYTHONPATH environment variable? Did you "
             "forget to activate a virtual environment?"
         ) from exc
+    if len(sys.argv) > 1:
+        execute_from_command_line(sys.argv)
+        return
     port = os.getenv('PORT', '8000')  # Default to 8000 if not set
     execute_from_command_line(['manage.py', 'runserver', f'0.0.0.0:{port}'])
 
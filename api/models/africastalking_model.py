@@ -1,6 +1,8 @@
 import os
 import africastalking
 from dotenv import load_dotenv
+from helpers.helpers import dedupe_recipients
+from helpers.log import upstream_call
 
 class AfricastalkingModel:
     """
@@ -42,7 +44,8 @@ class AfricastalkingModel:
 
         Args:
             message (str): The SMS message content to be sent.
-            recipients (list): A list of recipient phone numbers in international format.
+            recipients (list): A list of recipient phone numbers. Numbers are normalised to
+                E.164 and repeated handsets are only sent to once per batch.
 
         Returns:
             dict: The response from Africa's Talking API, or an error message in case of failure.
@@ -53,10 +56,16 @@ class AfricastalkingModel:
         if not recipients or not isinstance(recipients, list):
             return {"error": "recipients must be a non-empty list."}
 
+        try:
+            recipients = dedupe_recipients(recipients)
+        except ValueError as e:
+            return {"error": str(e)}
+
         try:
             sender = self.short_code
             # Send the SMS and return the API response
-            response = self.sms.send(message, recipients, sender)
+            with upstream_call("africastalking", "send_sms"):
+                response = self.sms.send(message, recipients, sender)
             return response
         except Exception as e:
             # Handle and return the error
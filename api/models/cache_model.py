@@ -0,0 +1,207 @@
+import time
+import threading
+
+# Primary key of each table, used to patch cached rows in place
+PRIMARY_KEYS = {
+    "customers": "customerid",
+    "orders": "orderid",
+}
+
+
+class QueryCacheModel:
+    """
+    An in-memory cache of query_records results, keyed by table and filters.
+    Cached entries expire after a TTL and are patched incrementally from
+    change events (see ChangeFeedModel), so long TTLs do not serve stale rows.
+
+    Methods:
+        get(table_name: str, filters: dict) -> list:
+            Returns the cached rows, or None on a miss.
+        generation(table_name: str) -> int:
+            Returns a counter that changes whenever a table's entries are patched or dropped.
+        set(table_name: str, filters: dict, rows: list, generation: int = None):
+            Caches the rows returned for a query, unless the table changed since generation.
+        invalidate(table_name: str = None):
+            Drops cached entries for a table, or all tables.
+        apply_change(table_name: str, event_type: str, record: dict, old_record: dict = None):
+            Patches cached entries with an INSERT, UPDATE or DELETE event.
+    """
+
+    def __init__(self, ttl: float = 60):
+        """
+        Initializes the QueryCacheModel.
+
+        Parameters:
+            ttl (float): The number of seconds an entry is served for.
+        """
+        self.ttl = ttl
+        self._entries = {}
+        self._generations = {}
+        self._all_generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, table_name: str, filters=None):
+        """
+        Returns the cached rows for a query.
+
+        Parameters:
+            table_name (str): The name of the table.
+            filters (dict): The filters of the query.
+
+        Returns:
+            list: A copy of the cached rows, or None if the query is not cached or has expired.
+        """
+        key = self._key(table_name, filters)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry["expires_at"] < time.monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self.hits += 1
+            return [dict(row) for row in entry["rows"]]
+
+    def generation(self, table_name: str) -> int:
+        """
+        Returns the generation of a table, which changes on every change event
+        or invalidation. Read it before querying Supabase and pass it to set.
+
+        Parameters:
+            table_name (str): The name of the table.
+
+        Returns:
+            int: The current generation.
+        """
+        with self._lock:
+            return self._all_generation + self._generations.get(table_name, 0)
+
+    def set(self, table_name: str, filters, rows: list, generation: int = None):
+        """
+        Caches the rows returned for a query.
+
+        Parameters:
+            table_name (str): The name of the table.
+            filters (dict): The filters of the query.
+            rows (list): The rows returned by Supabase.
+            generation (int): The table's generation before the query was sent. If a
+                change event or invalidation arrived since, the rows may be stale and
+                are not cached.
+        """
+        key = self._key(table_name, filters)
+        with self._lock:
+            if generation is not None and generation != self._all_generation + self._generations.get(table_name, 0):
+                return
+            self._entries[key] = {
+                "table": table_name,
+                "filters": dict(filters or {}),
+                "rows": [dict(row) for row in rows],
+                "expires_at": time.monotonic() + self.ttl,
+            }
+
+    def invalidate(self, table_name: str = None):
+        """
+        Drops cached entries.
+
+        Parameters:
+            table_name (str): The table to drop entries for. All entries are dropped if not given.
+        """
+        with self._lock:
+            if table_name is None:
+                self._all_generation += 1
+                self._entries.clear()
+            else:
+                self._generations[table_name] = self._generations.get(table_name, 0) + 1
+                for key in [key for key in self._entries if key[0] == table_name]:
+                    del self._entries[key]
+
+    def apply_change(self, table_name: str, event_type: str, record: dict, old_record: dict = None):
+        """
+        Patches cached entries of a table with a change event. Rows are added,
+        replaced or removed depending on whether they match each entry's filters.
+        Entries whose filters cannot be evaluated locally are dropped.
+
+        Parameters:
+            table_name (str): The table that changed.
+            event_type (str): INSERT, UPDATE or DELETE.
+            record (dict): The new row (empty for DELETE).
+            old_record (dict): The previous row, or at least its primary key, for UPDATE and DELETE.
+        """
+        primary_key = PRIMARY_KEYS.get(table_name)
+        event_type = event_type.upper()
+        record = record or {}
+        old_record = old_record or {}
+        row_id = record.get(primary_key, old_record.get(primary_key))
+        if primary_key is None or row_id is None:
+            self.invalidate(table_name)
+            return
+
+        with self._lock:
+            self._generations[table_name] = self._generations.get(table_name, 0) + 1
+            for key, entry in list(self._entries.items()):
+                if entry["table"] != table_name:
+                    continue
+                rows = [row for row in entry["rows"] if str(row.get(primary_key)) != str(row_id)]
+                if event_type in ("INSERT", "UPDATE"):
+                    matched = _matches(record, entry["filters"])
+                    if matched is None:
+                        del self._entries[key]
+                        continue
+                    if matched:
+                        rows.append(dict(record))
+                entry["rows"] = rows
+
+    def _key(self, table_name: str, filters):
+        return table_name, tuple(sorted(
+            (column, operator, _freeze(value)) for column, (operator, value) in (filters or {}).items()
+        ))
+
+
+def _freeze(value):
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    return value
+
+
+def _compare(left, right):
+    """
+    Compares a row value with a filter value the way PostgREST would, numerically
+    when both are numbers and as strings otherwise. Returns -1, 0 or 1.
+    """
+    try:
+        left, right = float(left), float(right)
+    except (TypeError, ValueError):
+        left, right = str(left), str(right)
+    return (left > right) - (left < right)
+
+
+def _matches(record: dict, filters: dict):
+    """
+    Evaluates query filters against a row.
+
+    Returns:
+        bool: Whether the row matches, or None if a filter cannot be evaluated locally.
+    """
+    for column, (operator, value) in filters.items():
+        if column not in record:
+            return None
+        actual = record[column]
+        if operator == "in":
+            matched = any(_compare(actual, item) == 0 for item in value)
+        elif operator in ("eq", "neq", "gt", "gte", "lt", "lte"):
+            if actual is None:
+                return False
+            order = _compare(actual, value)
+            matched = {
+                "eq": order == 0, "neq": order != 0,
+                "gt": order > 0, "gte": order >= 0,
+                "lt": order < 0, "lte": order <= 0,
+            }[operator]
+        else:
+            return None
+        if not matched:
+            return False
+    return True
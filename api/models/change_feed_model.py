@@ -0,0 +1,245 @@
+import os
+import abc
+import json
+import asyncio
+import logging
+import weakref
+import threading
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+
+class ChangeFeedModel(abc.ABC):
+    """
+    Base class for background subscribers to row changes on Supabase tables.
+    Each change is passed to the listeners' apply_change method, and listeners
+    are invalidated whenever events may have been missed. Subclasses implement
+    _run, the body of the background thread.
+
+    Methods:
+        start():
+            Starts the background thread.
+        stop():
+            Stops the background thread.
+        dispatch(event: dict):
+            Passes a change event to the listeners.
+    """
+
+    def __init__(self, listeners: list, tables=("customers", "orders")):
+        """
+        Initializes the ChangeFeedModel.
+
+        Parameters:
+            listeners (list): Objects with apply_change(table_name, event_type, record, old_record)
+                and invalidate(table_name) methods, e.g. QueryCacheModel.
+            tables (tuple): The tables to follow.
+        """
+        self.listeners = list(listeners)
+        self.tables = tuple(tables)
+        self._thread = None
+        self._stopped = threading.Event()
+        _running_feeds.add(self)
+
+    def start(self):
+        """
+        Starts the background thread if it is not running.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the background thread.
+        """
+        self._stopped.set()
+        _running_feeds.discard(self)
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+
+    def dispatch(self, event: dict):
+        """
+        Passes a change event to the listeners.
+
+        Parameters:
+            event (dict): The change, with keys table, type (INSERT, UPDATE or DELETE),
+                record and old_record.
+        """
+        table_name = event.get("table")
+        if table_name not in self.tables:
+            return
+        for listener in self.listeners:
+            try:
+                listener.apply_change(table_name, event["type"], event.get("record"), event.get("old_record"))
+            except Exception:
+                logger.exception("Error applying %s change on %s", event.get("type"), table_name)
+                listener.invalidate(table_name)
+
+    def invalidate(self):
+        """
+        Invalidates all followed tables in every listener, e.g. after a disconnect.
+        """
+        for listener in self.listeners:
+            for table_name in self.tables:
+                listener.invalidate(table_name)
+
+    def _after_fork(self):
+        if self._thread is not None and not self._stopped.is_set():
+            self._thread = None
+            self.invalidate()
+            self.start()
+
+    @abc.abstractmethod
+    def _run(self):
+        """
+        Follows changes and dispatches them until the model is stopped.
+        """
+
+
+class RealtimeChangeFeedModel(ChangeFeedModel):
+    """
+    Follows Postgres changes through Supabase Realtime. Reconnects with
+    backoff and invalidates the listeners whenever the connection drops.
+    """
+
+    def __init__(self, listeners: list, tables=("customers", "orders")):
+        super().__init__(listeners, tables)
+        load_dotenv(os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env'))
+        url, key = os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY")
+        if not url or not key:
+            raise ValueError("Supabase URL or key missing in the environment variables.")
+        self.realtime_url = f"{url}/realtime/v1"
+        self.key = key
+
+    def _run(self):
+        backoff = 1
+        while not self._stopped.is_set():
+            try:
+                asyncio.run(self._listen())
+                backoff = 1
+            except Exception:
+                logger.exception("Supabase Realtime change feed disconnected")
+            # Events may have been missed while disconnected
+            self.invalidate()
+            self._stopped.wait(backoff)
+            backoff = min(backoff * 2, 60)
+
+    async def _listen(self):
+        from realtime import AsyncRealtimeClient
+
+        client = AsyncRealtimeClient(self.realtime_url, self.key)
+        await client.connect()
+        channel = client.channel("db-changes")
+        for table_name in self.tables:
+            channel.on_postgres_changes("*", table=table_name, callback=self._on_change)
+        await channel.subscribe()
+        listener = asyncio.ensure_future(client.listen())
+        while not listener.done() and not self._stopped.is_set():
+            await asyncio.sleep(1)
+        listener.cancel()
+        await client.close()
+
+    def _on_change(self, payload: dict):
+        data = payload.get("data", payload)
+        self.dispatch({
+            "table": data.get("table"),
+            "type": data.get("type"),
+            "record": data.get("record"),
+            "old_record": data.get("old_record"),
+        })
+
+
+class FileChangeFeedModel(ChangeFeedModel):
+    """
+    A local stand-in for Supabase Realtime that replays change events from a
+    JSON lines file and follows lines appended to it. Each line holds one event:
+    {"table": "customers", "type": "UPDATE", "record": {...}, "old_record": {...}}
+    """
+
+    def __init__(self, path: str, listeners: list, tables=("customers", "orders"), poll_interval: float = 0.5):
+        """
+        Parameters:
+            path (str): The JSON lines file to replay.
+            listeners (list): See ChangeFeedModel.
+            tables (tuple): The tables to follow.
+            poll_interval (float): Seconds between checks for appended lines.
+        """
+        super().__init__(listeners, tables)
+        self.path = path
+        self.poll_interval = poll_interval
+        self._offset = 0
+
+    def replay(self):
+        """
+        Dispatches every complete line added to the file since the last call.
+
+        Returns:
+            int: The number of events dispatched.
+        """
+        if not os.path.exists(self.path):
+            return 0
+        if os.path.getsize(self.path) < self._offset:
+            # The file was truncated or replaced
+            self._offset = 0
+            self.invalidate()
+
+        count = 0
+        with open(self.path, "rb") as file:
+            file.seek(self._offset)
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break
+                self._offset += len(line)
+                if not line.strip():
+                    continue
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning("Skipping malformed change event in %s: %r", self.path, line)
+                    continue
+                self.dispatch(event)
+                count += 1
+        return count
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.replay()
+            except Exception:
+                logger.exception("Error replaying change events from %s", self.path)
+                self.invalidate()
+            self._stopped.wait(self.poll_interval)
+
+
+def create_change_feed_model(source: str, listeners: list, tables=("customers", "orders")):
+    """
+    Creates a change feed from a source setting.
+
+    Parameters:
+        source (str): "realtime" for Supabase Realtime, or the path of a JSON lines file to replay.
+        listeners (list): See ChangeFeedModel.
+        tables (tuple): The tables to follow.
+
+    Returns:
+        ChangeFeedModel: The change feed, or None if source is empty.
+    """
+    if not source:
+        return None
+    if source == "realtime":
+        return RealtimeChangeFeedModel(listeners, tables)
+    return FileChangeFeedModel(source, listeners, tables)
+
+
+_running_feeds = weakref.WeakSet()
+
+
+def _restart_feeds():
+    for feed in list(_running_feeds):
+        feed._after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_feeds)
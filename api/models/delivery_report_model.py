@@ -0,0 +1,212 @@
+import os
+import time
+import atexit
+import logging
+import weakref
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class DeliveryReportModel:
+    """
+    Buffers SMS delivery reports posted by Africa's Talking and writes them to
+    Supabase in batches from a background thread, so a burst of callbacks
+    becomes a few bulk upserts instead of one write per callback.
+
+    Reports are written when a batch fills up or every flush_interval seconds.
+    Within a batch, only the latest report per message is kept. A batch that
+    fails to write is put back at the front of the buffer and retried; reports
+    that do not fit in the buffer are dropped and counted.
+
+    Methods:
+        add(report: dict) -> bool:
+            Buffers a report, returning False if the buffer is full.
+        flush() -> int:
+            Writes one batch of buffered reports.
+        stats() -> dict:
+            Returns ingestion counters and throughput.
+    """
+
+    def __init__(self, upsert, table_name: str = "sms_delivery_reports", batch_size: int = 500,
+                 flush_interval: float = 1, max_buffered: int = 10000):
+        """
+        Initializes the DeliveryReportModel.
+
+        Parameters:
+            upsert (callable): upsert(table_name, rows) writing rows to Supabase,
+                e.g. SupabaseModel.upsert_record.
+            table_name (str): The table reports are written to.
+            batch_size (int): The maximum number of reports written per upsert.
+            flush_interval (float): Maximum seconds a report waits in the buffer.
+            max_buffered (int): The maximum number of reports held in the buffer.
+        """
+        self.upsert = upsert
+        self.table_name = table_name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffered = max_buffered
+        self._buffer = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._batch_ready = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._started_at = time.monotonic()
+        self._drained_at = self._started_at
+        self.received = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed_flushes = 0
+        _running_models.add(self)
+
+    def add(self, report: dict) -> bool:
+        """
+        Buffers a delivery report.
+
+        Parameters:
+            report (dict): A row for the delivery reports table, keyed by messageid.
+
+        Returns:
+            bool: Whether the report was buffered. False means the buffer is full.
+        """
+        with self._lock:
+            if len(self._buffer) >= self.max_buffered:
+                self.dropped += 1
+                return False
+            self._buffer.append(report)
+            self.received += 1
+            if len(self._buffer) >= self.batch_size:
+                self._batch_ready.set()
+        return True
+
+    def flush(self) -> int:
+        """
+        Writes one batch of buffered reports to Supabase.
+
+        Returns:
+            int: The number of rows written.
+
+        Raises:
+            Exception: If the upsert fails. The batch is put back in the buffer.
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+                if len(self._buffer) < self.batch_size:
+                    self._batch_ready.clear()
+            if not batch:
+                return 0
+
+            # Later reports for a message supersede earlier ones
+            rows = list({report["messageid"]: report for report in batch}.values())
+            started_at = time.perf_counter()
+            try:
+                self.upsert(self.table_name, rows)
+            except Exception:
+                self.failed_flushes += 1
+                self._requeue(batch)
+                raise
+            self.written += len(rows)
+            logger.info(
+                "Wrote %d delivery reports in %.1f ms",
+                len(rows),
+                (time.perf_counter() - started_at) * 1000,
+                extra={"buffered": len(self._buffer), "received": self.received, "dropped": self.dropped},
+            )
+            return len(rows)
+
+    def _requeue(self, batch: list):
+        with self._lock:
+            room = self.max_buffered - len(self._buffer)
+            kept = batch[:max(room, 0)]
+            self.dropped += len(batch) - len(kept)
+            self._buffer.extendleft(reversed(kept))
+
+    def stats(self) -> dict:
+        """
+        Returns ingestion counters since the model was created.
+
+        Returns:
+            dict: Reports received, written, dropped and buffered, failed flushes, and
+                reports received and written per second.
+        """
+        elapsed = max(time.monotonic() - self._started_at, 1e-9)
+        return {
+            "received": self.received,
+            "written": self.written,
+            "dropped": self.dropped,
+            "buffered": len(self._buffer),
+            "failed_flushes": self.failed_flushes,
+            "received_per_second": round(self.received / elapsed, 2),
+            "written_per_second": round(self.written / elapsed, 2),
+        }
+
+    def start(self):
+        """
+        Starts the background flush thread if it is not running.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="DeliveryReportModel", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the background flush thread, writing the reports still buffered.
+        """
+        self._stopped.set()
+        self._batch_ready.set()
+        _running_models.discard(self)
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        self._flush_buffered()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._batch_ready.wait(max(self._drained_at + self.flush_interval - time.monotonic(), 0))
+            # Write full batches as they fill up, and whatever is left once per interval
+            drain = time.monotonic() >= self._drained_at + self.flush_interval
+            if not self._flush_buffered(1 if drain else self.batch_size):
+                # Back off instead of retrying on every report added
+                self._stopped.wait(self.flush_interval)
+            if drain:
+                self._drained_at = time.monotonic()
+
+    def _flush_buffered(self, minimum: int = 1) -> bool:
+        try:
+            while len(self._buffer) >= minimum:
+                self.flush()
+            return True
+        except Exception:
+            logger.exception("Error writing delivery reports to %s", self.table_name)
+            return False
+
+    def _after_fork(self):
+        # Reports buffered before the fork belong to the parent process
+        self._buffer = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        if self._thread is not None and not self._stopped.is_set():
+            self._thread = None
+            self.start()
+
+
+_running_models = weakref.WeakSet()
+
+
+def _stop_models():
+    for model in list(_running_models):
+        model.stop()
+
+
+def _restart_models():
+    for model in list(_running_models):
+        model._after_fork()
+
+
+atexit.register(_stop_models)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_models)
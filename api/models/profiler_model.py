@@ -0,0 +1,223 @@
+import os
+import json
+import time
+import glob
+import atexit
+import logging
+import weakref
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+REPORT_ORDERINGS = ("avg_ms", "p95_ms", "max_ms", "total_ms", "count")
+
+
+class ProfilerModel:
+    """
+    Records Supabase calls made through SupabaseModel into a fixed-size ring
+    buffer and summarises them into a slow-query report grouped by table,
+    operation and filter shape.
+
+    Each process keeps its own buffer. When a dump directory is given, a
+    background thread periodically writes the buffer to
+    supabase-profile-<pid>.json there, so the supabase_slow_queries management
+    command can merge every worker. Recording a call never does I/O.
+
+    Methods:
+        record(table_name, operation, filters, rows, payload_bytes, duration_ms, error=False):
+            Records one call.
+        report(limit: int = 10, order_by: str = "avg_ms") -> list:
+            Returns the slowest call shapes.
+        dump(path: str = None):
+            Writes the buffer to a JSON file.
+        load(paths: list) -> ProfilerModel:
+            Creates a profiler holding the calls from dumped files.
+    """
+
+    def __init__(self, capacity: int = 1000, dump_dir: str = None, dump_interval: float = 10):
+        """
+        Initializes the ProfilerModel.
+
+        Parameters:
+            capacity (int): The number of most recent calls kept.
+            dump_dir (str): An optional directory the buffer is dumped to.
+            dump_interval (float): Seconds between dumps.
+        """
+        self.calls = deque(maxlen=capacity)
+        self.dump_dir = dump_dir
+        self.dump_interval = dump_interval
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        if dump_dir:
+            _dumping_profilers.add(self)
+            self._start_thread()
+
+    def _start_thread(self):
+        self._thread = threading.Thread(target=self._dump_periodically, name="ProfilerModel", daemon=True)
+        self._thread.start()
+
+    def _dump_periodically(self):
+        while not self._stopped.wait(self.dump_interval):
+            self._safe_dump()
+
+    def _safe_dump(self):
+        try:
+            self.dump()
+        except Exception:
+            logger.exception("Error dumping the Supabase profile to %s", self.dump_dir)
+
+    def stop(self):
+        """
+        Stops the background dump thread, dumping the buffer one last time.
+        """
+        self._stopped.set()
+        _dumping_profilers.discard(self)
+        if self.dump_dir:
+            self._safe_dump()
+
+    def record(self, table_name: str, operation: str, filters, rows: int, payload_bytes: int,
+               duration_ms: float, error: bool = False):
+        """
+        Records one Supabase call.
+
+        Parameters:
+            table_name (str): The table called.
+            operation (str): insert, update, upsert, delete or query.
+            filters (dict): The filters of the call; only their shape is kept.
+            rows (int): The number of rows returned.
+            payload_bytes (int): The size of the JSON payload sent.
+            duration_ms (float): The duration of the call.
+            error (bool): Whether the call failed.
+        """
+        self.calls.append({
+            "table": table_name,
+            "operation": operation,
+            "filter_shape": filter_shape(filters),
+            "rows": rows,
+            "payload_bytes": payload_bytes,
+            "duration_ms": round(duration_ms, 3),
+            "error": error,
+            "time": time.time(),
+        })
+
+    def report(self, limit: int = 10, order_by: str = "avg_ms") -> list:
+        """
+        Summarises the recorded calls by table, operation and filter shape.
+
+        Parameters:
+            limit (int): The number of shapes to return.
+            order_by (str): One of avg_ms, p95_ms, max_ms, total_ms or count, sorted descending.
+
+        Returns:
+            list: A summary per shape, slowest first.
+
+        Raises:
+            ValueError: If order_by is not supported.
+        """
+        if order_by not in REPORT_ORDERINGS:
+            raise ValueError(f"order_by must be one of {', '.join(REPORT_ORDERINGS)}.")
+        groups = {}
+        for call in list(self.calls):
+            groups.setdefault((call["table"], call["operation"], call["filter_shape"]), []).append(call)
+
+        summaries = []
+        for (table_name, operation, shape), calls in groups.items():
+            durations = sorted(call["duration_ms"] for call in calls)
+            total_ms = sum(durations)
+            summaries.append({
+                "table": table_name,
+                "operation": operation,
+                "filter_shape": shape,
+                "count": len(calls),
+                "errors": sum(call["error"] for call in calls),
+                "total_ms": round(total_ms, 3),
+                "avg_ms": round(total_ms / len(calls), 3),
+                "p95_ms": durations[min(len(durations) - 1, int(len(durations) * 0.95))],
+                "max_ms": durations[-1],
+                "avg_rows": round(sum(call["rows"] for call in calls) / len(calls), 1),
+                "avg_payload_bytes": round(sum(call["payload_bytes"] for call in calls) / len(calls), 1),
+            })
+        summaries.sort(key=lambda summary: summary[order_by], reverse=True)
+        return summaries[:limit]
+
+    def dump(self, path: str = None):
+        """
+        Writes the recorded calls to a JSON file.
+
+        Parameters:
+            path (str): The file to write. Defaults to supabase-profile-<pid>.json in the dump directory.
+        """
+        path = path or os.path.join(self.dump_dir, f"supabase-profile-{os.getpid()}.json")
+        with self._lock:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            temporary_path = f"{path}.tmp"
+            with open(temporary_path, "w") as file:
+                json.dump(list(self.calls), file)
+            os.replace(temporary_path, path)
+
+    @classmethod
+    def load(cls, paths: list):
+        """
+        Creates a profiler holding the calls from dumped files.
+
+        Parameters:
+            paths (list): Files written by dump, or directories containing them.
+
+        Returns:
+            ProfilerModel: A profiler with the merged calls.
+        """
+        files = []
+        for path in paths:
+            files.extend(sorted(glob.glob(os.path.join(path, "supabase-profile-*.json"))) if os.path.isdir(path) else [path])
+        calls = []
+        for file_path in files:
+            with open(file_path) as file:
+                calls.extend(json.load(file))
+        profiler = cls(capacity=max(len(calls), 1))
+        profiler.calls.extend(calls)
+        return profiler
+
+
+_dumping_profilers = weakref.WeakSet()
+
+
+def _stop_profilers():
+    for profiler in list(_dumping_profilers):
+        profiler.stop()
+
+
+def _restart_profilers():
+    # The dump thread does not survive a fork; each worker dumps to its own file
+    for profiler in list(_dumping_profilers):
+        profiler._lock = threading.Lock()
+        profiler._start_thread()
+
+
+atexit.register(_stop_profilers)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_profilers)
+
+
+def filter_shape(filters) -> str:
+    """
+    Normalises filters to their shape, dropping values, e.g.
+    {"customerid": ("eq", 5)} becomes "customerid=eq".
+
+    Parameters:
+        filters (dict): The filters, as accepted by SupabaseModel.
+
+    Returns:
+        str: The filter shape, or an empty string without filters.
+    """
+    return "&".join(f"{column}={operator}" for column, (operator, _) in sorted((filters or {}).items()))
+
+
+def payload_size(payload) -> int:
+    """
+    Returns the size in bytes of a payload encoded as JSON.
+    """
+    if payload is None:
+        return 0
+    return len(json.dumps(payload, default=str).encode())
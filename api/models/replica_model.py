@@ -0,0 +1,364 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import weakref
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Replicated tables: primary key and the columns indexed locally
+REPLICA_TABLES = {
+    "customers": ("customerid", ("customerphonee164",)),
+    "orders": ("orderid", ("customerid",)),
+}
+
+_SQL_OPERATORS = {"eq": "=", "neq": "!=", "gt": ">", "gte": ">=", "lt": "<", "lte": "<=", "ilike": "LIKE"}
+
+
+class ReplicaModel:
+    """
+    A local read replica of Supabase tables in SQLite. A background thread
+    copies new rows incrementally, using the largest primary key copied by
+    the previous sync as the watermark, and periodically reconciles the whole table
+    to pick up updates and deletes. Row changes can also be applied as they
+    happen by attaching the replica to a ChangeFeedModel.
+
+    Every worker process shares the SQLite file and reads from it, but only
+    the process holding the sync lease (a row in the file) syncs. The lease
+    expires when its holder stops renewing it, and another process takes
+    over. Sync state is kept in the file too, so all workers see it.
+
+    Methods:
+        query(table_name: str, filters: dict) -> list:
+            Returns matching rows from the replica, or None if Supabase should be queried.
+        sync(table_name: str, full: bool = False) -> int:
+            Copies new rows (or all rows) from Supabase.
+        apply_change(table_name: str, event_type: str, record: dict, old_record: dict = None):
+            Applies an INSERT, UPDATE or DELETE event.
+        invalidate(table_name: str = None):
+            Marks tables as stale until their next full sync.
+    """
+
+    def __init__(self, fetch, path: str, tables=("customers",), interval: float = 30, max_staleness: float = 60,
+                 full_sync_interval: float = 3600, batch_size: int = 1000, lease_timeout: float = None):
+        """
+        Initializes the ReplicaModel and creates the local tables.
+
+        Parameters:
+            fetch (callable): fetch(table_name, filters, order_by, limit) returning rows from
+                Supabase, e.g. SupabaseModel.fetch_records.
+            path (str): The SQLite database file.
+            tables (tuple): The tables to replicate.
+            interval (float): Seconds between incremental syncs.
+            max_staleness (float): Seconds after a sync for which the replica serves reads.
+            full_sync_interval (float): Seconds between full reconciliations. Without a change
+                feed, this bounds how long updates and deletes by other services go unseen.
+            batch_size (int): Rows fetched from Supabase per request.
+            lease_timeout (float): Seconds the sync lease is held without renewal. Defaults to
+                three sync intervals.
+        """
+        unknown = [table_name for table_name in tables if table_name not in REPLICA_TABLES]
+        if unknown:
+            raise ValueError(f"Tables cannot be replicated: {', '.join(unknown)}")
+        self.fetch = fetch
+        self.path = str(path)
+        self.tables = tuple(tables)
+        self.interval = interval
+        self.max_staleness = max_staleness
+        self.full_sync_interval = full_sync_interval
+        self.batch_size = batch_size
+        self.lease_timeout = lease_timeout if lease_timeout is not None else interval * 3
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._thread = None
+        self._stopped = threading.Event()
+        self._create_tables()
+        _running_replicas.add(self)
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+    def _create_tables(self):
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS replica_sync_state "
+                "(table_name TEXT PRIMARY KEY, watermark INTEGER, synced_at REAL, full_synced_at REAL)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS replica_sync_lease "
+                "(id INTEGER PRIMARY KEY CHECK (id = 1), owner TEXT, expires_at REAL)"
+            )
+            connection.execute("INSERT OR IGNORE INTO replica_sync_lease (id, owner, expires_at) VALUES (1, NULL, 0)")
+            for table_name in self.tables:
+                connection.execute("INSERT OR IGNORE INTO replica_sync_state (table_name) VALUES (?)", (table_name,))
+                _, indexed = REPLICA_TABLES[table_name]
+                columns = "".join(f", {column}" for column in indexed)
+                connection.execute(
+                    f"CREATE TABLE IF NOT EXISTS replica_{table_name} (id INTEGER PRIMARY KEY{columns}, data TEXT NOT NULL)"
+                )
+                for column in indexed:
+                    connection.execute(
+                        f"CREATE INDEX IF NOT EXISTS replica_{table_name}_{column}_idx ON replica_{table_name} ({column})"
+                    )
+
+    def _state(self, table_name: str) -> tuple:
+        """
+        Returns the watermark, last sync time and last full sync time of a table.
+        """
+        row = self._connection().execute(
+            "SELECT watermark, synced_at, full_synced_at FROM replica_sync_state WHERE table_name = ?", (table_name,)
+        ).fetchone()
+        return row or (None, None, None)
+
+    @property
+    def _owner(self) -> str:
+        return f"{os.getpid()}:{id(self)}"
+
+    def acquire_lease(self) -> bool:
+        """
+        Takes or renews the sync lease, unless another process holds it.
+
+        Returns:
+            bool: Whether this replica holds the lease and should sync.
+        """
+        connection = self._connection()
+        now = time.time()
+        with self._write_lock, connection:
+            cursor = connection.execute(
+                "UPDATE replica_sync_lease SET owner = ?, expires_at = ? WHERE id = 1 AND (owner = ? OR expires_at < ?)",
+                (self._owner, now + self.lease_timeout, self._owner, now),
+            )
+        return cursor.rowcount == 1
+
+    def release_lease(self):
+        """
+        Releases the sync lease if this replica holds it, so another process can take over.
+        """
+        connection = self._connection()
+        with self._write_lock, connection:
+            connection.execute("UPDATE replica_sync_lease SET expires_at = 0 WHERE id = 1 AND owner = ?", (self._owner,))
+
+    def _upsert(self, connection, table_name: str, rows: list):
+        primary_key, indexed = REPLICA_TABLES[table_name]
+        columns = ", ".join(("id",) + indexed + ("data",))
+        placeholders = ", ".join("?" * (len(indexed) + 2))
+        connection.executemany(
+            f"INSERT OR REPLACE INTO replica_{table_name} ({columns}) VALUES ({placeholders})",
+            [(row[primary_key],) + tuple(row.get(column) for column in indexed) + (json.dumps(row),) for row in rows],
+        )
+
+    def _fetch_after(self, table_name: str, watermark):
+        """
+        Yields pages of rows with a primary key above the watermark, in primary key order.
+        """
+        primary_key, _ = REPLICA_TABLES[table_name]
+        while True:
+            filters = {primary_key: ("gt", watermark)} if watermark is not None else None
+            rows = self.fetch(table_name, filters, order_by=primary_key, limit=self.batch_size)
+            if rows:
+                yield rows
+                watermark = rows[-1][primary_key]
+            if len(rows) < self.batch_size:
+                return
+
+    def sync(self, table_name: str, full: bool = False) -> int:
+        """
+        Copies rows from Supabase into the replica. An incremental sync copies rows
+        above the watermark; a full sync reloads the table, dropping deleted rows.
+        The first sync of a table is always a full sync. Rows above both the fetched
+        rows and the previous watermark were applied locally after the fetch began,
+        so a full sync keeps them.
+
+        Parameters:
+            table_name (str): The table to sync.
+            full (bool): Whether to reload the whole table.
+
+        Returns:
+            int: The number of rows copied.
+        """
+        started_at = time.time()
+        connection = self._connection()
+        primary_key, _ = REPLICA_TABLES[table_name]
+        # Only syncs move the watermark: rows written locally may be ahead of
+        # rows other services inserted that have not been copied yet
+        watermark, _, _ = self._state(table_name)
+        if full or watermark is None:
+            rows = [row for page in self._fetch_after(table_name, None) for row in page]
+            new_watermark = max((row[primary_key] for row in rows), default=0)
+            with self._write_lock, connection:
+                connection.execute("CREATE TEMP TABLE IF NOT EXISTS replica_fetched_ids (id INTEGER PRIMARY KEY)")
+                connection.execute("DELETE FROM replica_fetched_ids")
+                connection.executemany("INSERT INTO replica_fetched_ids (id) VALUES (?)", [(row[primary_key],) for row in rows])
+                connection.execute(
+                    f"DELETE FROM replica_{table_name} WHERE id <= ? AND id NOT IN (SELECT id FROM replica_fetched_ids)",
+                    (max(new_watermark, watermark or 0),),
+                )
+                self._upsert(connection, table_name, rows)
+                connection.execute(
+                    "UPDATE replica_sync_state SET watermark = ?, synced_at = ?, full_synced_at = ? WHERE table_name = ?",
+                    (new_watermark, started_at, started_at, table_name),
+                )
+            return len(rows)
+
+        count = 0
+        for rows in self._fetch_after(table_name, watermark):
+            with self._write_lock, connection:
+                self._upsert(connection, table_name, rows)
+                connection.execute(
+                    "UPDATE replica_sync_state SET watermark = ? WHERE table_name = ?", (rows[-1][primary_key], table_name)
+                )
+            count += len(rows)
+        with self._write_lock, connection:
+            connection.execute("UPDATE replica_sync_state SET synced_at = ? WHERE table_name = ?", (started_at, table_name))
+        return count
+
+    def is_fresh(self, table_name: str) -> bool:
+        """
+        Returns whether the replica of a table is within the staleness bound.
+        """
+        _, synced_at, _ = self._state(table_name)
+        return synced_at is not None and time.time() - synced_at <= self.max_staleness
+
+    def query(self, table_name: str, filters=None):
+        """
+        Queries rows from the replica.
+
+        Parameters:
+            table_name (str): The name of the table.
+            filters (dict): The filters, as accepted by SupabaseModel.query_records.
+
+        Returns:
+            list: The matching rows, or None when Supabase should be queried instead: the table
+                is not replicated or is stale, a filter is not supported locally, or no rows match
+                (they may have been created since the last sync).
+        """
+        if table_name not in self.tables or not self.is_fresh(table_name):
+            return None
+        primary_key, indexed = REPLICA_TABLES[table_name]
+        clauses, parameters = [], []
+        for column, (operator, value) in (filters or {}).items():
+            if column == primary_key:
+                expression = "id"
+            elif column in indexed:
+                expression = column
+            elif column.isidentifier():
+                expression = f"json_extract(data, '$.{column}')"
+            else:
+                return None
+            if operator == "in":
+                values = list(value)
+                if not values:
+                    return None
+                clauses.append(f"{expression} IN ({', '.join('?' * len(values))})")
+                parameters.extend(values)
+            elif operator in _SQL_OPERATORS:
+                clauses.append(f"{expression} {_SQL_OPERATORS[operator]} ?")
+                parameters.append(value)
+            else:
+                return None
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._connection().execute(f"SELECT data FROM replica_{table_name}{where} ORDER BY id", parameters)
+        data = [json.loads(row[0]) for row in rows]
+        return data or None
+
+    def apply_change(self, table_name: str, event_type: str, record: dict, old_record: dict = None):
+        """
+        Applies a change event to the replica.
+
+        Parameters:
+            table_name (str): The table that changed.
+            event_type (str): INSERT, UPDATE or DELETE.
+            record (dict): The new row (empty for DELETE).
+            old_record (dict): The previous row, or at least its primary key, for DELETE.
+        """
+        if table_name not in self.tables:
+            return
+        primary_key, _ = REPLICA_TABLES[table_name]
+        connection = self._connection()
+        with self._write_lock, connection:
+            if event_type.upper() == "DELETE":
+                row_id = (old_record or record or {}).get(primary_key)
+                if row_id is not None:
+                    connection.execute(f"DELETE FROM replica_{table_name} WHERE id = ?", (row_id,))
+            elif record and record.get(primary_key) is not None:
+                self._upsert(connection, table_name, [record])
+
+    def invalidate(self, table_name: str = None):
+        """
+        Marks tables as stale, so reads go to Supabase until the next full sync.
+
+        Parameters:
+            table_name (str): The table to mark as stale. All tables are marked if not given.
+        """
+        connection = self._connection()
+        with self._write_lock, connection:
+            for name in ([table_name] if table_name else self.tables):
+                connection.execute(
+                    "UPDATE replica_sync_state SET synced_at = NULL, full_synced_at = NULL WHERE table_name = ?", (name,)
+                )
+
+    def start(self):
+        """
+        Starts the background sync thread if it is not running. The thread only
+        syncs while this replica holds the sync lease.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="ReplicaModel", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the background sync thread.
+        """
+        self._stopped.set()
+        _running_replicas.discard(self)
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        try:
+            self.release_lease()
+        except sqlite3.Error:
+            logger.exception("Error releasing the replica sync lease")
+
+    def _run(self):
+        while not self._stopped.is_set():
+            for table_name in self.tables:
+                try:
+                    # Renewed before each table, so a long full sync does not lose it
+                    if not self.acquire_lease():
+                        break
+                    _, _, full_synced_at = self._state(table_name)
+                    full = full_synced_at is None or time.time() - full_synced_at >= self.full_sync_interval
+                    self.sync(table_name, full=full)
+                except Exception:
+                    logger.exception("Error syncing the %s replica", table_name)
+            self._stopped.wait(self.interval)
+
+    def _after_fork(self):
+        # SQLite connections must not be shared with the parent process
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        if self._thread is not None and not self._stopped.is_set():
+            self._thread = None
+            self.start()
+
+
+_running_replicas = weakref.WeakSet()
+
+
+def _restart_replicas():
+    for replica in list(_running_replicas):
+        replica._after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_replicas)
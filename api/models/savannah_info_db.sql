@@ -1,3 +1,6 @@
+-- Creates the database from scratch. To upgrade an existing database without
+-- losing data, run savannah_info_db_upgrade.sql instead.
+
 -- Drop the existing database if it exists
 DROP DATABASE IF EXISTS savannah_info;
 
@@ -15,9 +18,14 @@ CREATE TABLE IF NOT EXISTS customers (
     CustomerID serial PRIMARY KEY,
     CustomerFName text NOT NULL,
     CustomerLName text NOT NULL,
-    CustomerPhoneNo numeric(12) NOT NULL
+    CustomerPhoneNo numeric(12) NOT NULL,
+    CustomerPhoneE164 text,
+    CustomerCarrier text
 );
 
+-- Lookups by normalised phone number
+CREATE INDEX IF NOT EXISTS customers_phone_e164_idx ON customers (CustomerPhoneE164);
+
 -- Create the orders table
 CREATE TABLE IF NOT EXISTS orders (
     OrderID serial PRIMARY KEY,
@@ -29,3 +37,17 @@ CREATE TABLE IF NOT EXISTS orders (
     FOREIGN KEY (CustomerID) REFERENCES customers (CustomerID) ON DELETE CASCADE
 );
 
+-- Create the SMS delivery reports table, upserted in batches from Africa's Talking callbacks
+CREATE TABLE IF NOT EXISTS sms_delivery_reports (
+    MessageID text PRIMARY KEY,
+    Status text NOT NULL,
+    PhoneNumber text,
+    NetworkCode text,
+    FailureReason text,
+    RetryCount int,
+    ReportedAt timestamp DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Delivery rates by status
+CREATE INDEX IF NOT EXISTS sms_delivery_reports_status_idx ON sms_delivery_reports (Status);
+
@@ -0,0 +1,34 @@
+-- Upgrades an existing savannah_info database in place, without dropping data:
+--   psql -d savannah_info -f savannah_info_db_upgrade.sql
+-- savannah_info_db.sql already creates new databases with these changes.
+
+-- Add the normalised phone number columns
+ALTER TABLE customers ADD COLUMN IF NOT EXISTS CustomerPhoneE164 text;
+ALTER TABLE customers ADD COLUMN IF NOT EXISTS CustomerCarrier text;
+
+-- Lookups by normalised phone number
+CREATE INDEX IF NOT EXISTS customers_phone_e164_idx ON customers (CustomerPhoneE164);
+
+-- Backfill the columns for existing customers, whose numbers are stored with the country code
+UPDATE customers
+SET CustomerPhoneE164 = '+' || CustomerPhoneNo::text
+WHERE CustomerPhoneE164 IS NULL;
+
+-- Carriers by Kenyan mobile prefix, as in helpers.KE_CARRIER_PREFIXES; unknown prefixes stay NULL
+UPDATE customers
+SET CustomerCarrier = CASE
+    WHEN prefix BETWEEN 110 AND 115 OR prefix BETWEEN 700 AND 729 OR prefix BETWEEN 740 AND 743
+        OR prefix IN (745, 746, 748) OR prefix BETWEEN 757 AND 759 OR prefix IN (768, 769)
+        OR prefix BETWEEN 790 AND 799 THEN 'Safaricom'
+    WHEN prefix BETWEEN 100 AND 102 OR prefix BETWEEN 730 AND 739 OR prefix BETWEEN 750 AND 756
+        OR prefix = 762 OR prefix BETWEEN 780 AND 789 THEN 'Airtel'
+    WHEN prefix BETWEEN 770 AND 779 THEN 'Telkom'
+    WHEN prefix BETWEEN 763 AND 766 THEN 'Equitel'
+    WHEN prefix = 747 THEN 'Faiba'
+END
+FROM (
+    SELECT CustomerID AS id, substring(CustomerPhoneE164 FROM 5 FOR 3)::int AS prefix
+    FROM customers
+    WHERE CustomerPhoneE164 ~ '^\+254[0-9]{9}$'
+) AS prefixes
+WHERE customers.CustomerID = prefixes.id AND customers.CustomerCarrier IS NULL;
@@ -1,7 +1,60 @@
 import os
 import json
+import time
+import inspect
+import logging
+from functools import wraps
 from dotenv import load_dotenv
 from supabase import create_client, Client
+from helpers.log import upstream_call
+from models.profiler_model import payload_size
+
+logger = logging.getLogger(__name__)
+
+# Filter operators whose postgrest method name differs, as "in" is a Python keyword
+_QUERY_METHODS = {"in": "in_"}
+
+
+def profiled(operation: str):
+    """
+    Records calls of a SupabaseModel method in the model's profiler, if it has one.
+
+    Parameters:
+        operation (str): The operation recorded, e.g. "insert".
+    """
+    def decorator(method):
+        signature = inspect.signature(method)
+
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if self.profiler is None:
+                return method(self, *args, **kwargs)
+            arguments = signature.bind(self, *args, **kwargs).arguments
+            data, error = None, False
+            start = time.perf_counter()
+            try:
+                data = method(self, *args, **kwargs)
+                return data
+            except Exception:
+                error = True
+                raise
+            finally:
+                # Profiling must never fail the call it measures
+                try:
+                    self.profiler.record(
+                        arguments["table_name"],
+                        operation,
+                        arguments.get("filters"),
+                        len(data) if isinstance(data, list) else 0,
+                        payload_size(arguments.get("payload")),
+                        (time.perf_counter() - start) * 1000,
+                        error,
+                    )
+                except Exception:
+                    logger.exception("Error profiling %s on %s", operation, arguments.get("table_name"))
+        return wrapper
+    return decorator
+
 
 class SupabaseModel:
     """
@@ -10,11 +63,23 @@ class SupabaseModel:
     Provides methods for inserting, updating, querying, and deleting records.
     """
 
-    def __init__(self):
+    def __init__(self, cache=None, replica=None, profiler=None):
         """
         Initializes the SupabaseModel by loading environment variables
         from an .env file and creating a Supabase client.
+
+        Parameters:
+            cache (QueryCacheModel): An optional cache for query_records results.
+            replica (ReplicaModel): An optional local read replica for query_records. It
+                can also be attached later, as it syncs through fetch_records.
+            profiler (ProfilerModel): An optional profiler recording every call made to Supabase.
+                Reads are recorded as "query" by fetch_records, so cache and replica hits are not.
+
+        Rows written through this model are applied to the cache and the replica straight away.
         """
+        self.cache = cache
+        self.replica = replica
+        self.profiler = profiler
         load_dotenv(os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env'))
         url, key = os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY")
         if not url or not key:
@@ -37,6 +102,7 @@ class SupabaseModel:
         except json.JSONDecodeError:
             raise ValueError("Error parsing the response JSON.")
 
+    @profiled("insert")
     def insert_record(self, table_name: str, payload: dict):
         """
         Inserts a new record into the specified table.
@@ -52,11 +118,15 @@ class SupabaseModel:
             Exception: If there is an error during insertion.
         """
         try:
-            response = self.supabase.table(table_name).insert(payload).execute()
-            return self.parse_response(response)
+            with upstream_call("supabase", f"insert:{table_name}"):
+                response = self.supabase.table(table_name).insert(payload).execute()
+            data = self.parse_response(response)
+            self._apply_locally(table_name, "INSERT", data)
+            return data
         except Exception as e:
             raise Exception(f"Error inserting record into {table_name}: {e}")
 
+    @profiled("update")
     def update_record(self, table_name: str, payload: dict, filters=None):
         """
         Updates records in the specified table based on filters.
@@ -74,11 +144,15 @@ class SupabaseModel:
         """
         try:
             query = self.supabase.table(table_name).update(payload)
-            response = self._apply_filters(query, filters).execute()
-            return self.parse_response(response)
+            with upstream_call("supabase", f"update:{table_name}"):
+                response = self._apply_filters(query, filters).execute()
+            data = self.parse_response(response)
+            self._apply_locally(table_name, "UPDATE", data)
+            return data
         except Exception as e:
             raise Exception(f"Error updating record in {table_name}: {e}")
 
+    @profiled("upsert")
     def upsert_record(self, table_name: str, payload: dict, filters=None):
         """
         Upserts a record (insert or update) in the specified table based on filters.
@@ -96,11 +170,15 @@ class SupabaseModel:
         """
         try:
             query = self.supabase.table(table_name).upsert(payload)
-            response = self._apply_filters(query, filters).execute()
-            return self.parse_response(response)
+            with upstream_call("supabase", f"upsert:{table_name}"):
+                response = self._apply_filters(query, filters).execute()
+            data = self.parse_response(response)
+            self._apply_locally(table_name, "UPDATE", data)
+            return data
         except Exception as e:
             raise Exception(f"Error upserting record in {table_name}: {e}")
 
+    @profiled("delete")
     def delete_record(self, table_name: str, filters=None):
         """
         Deletes records in the specified table based on filters.
@@ -117,14 +195,18 @@ class SupabaseModel:
         """
         try:
             query = self.supabase.table(table_name).delete()
-            response = self._apply_filters(query, filters).execute()
-            return self.parse_response(response)
+            with upstream_call("supabase", f"delete:{table_name}"):
+                response = self._apply_filters(query, filters).execute()
+            data = self.parse_response(response)
+            self._apply_locally(table_name, "DELETE", data)
+            return data
         except Exception as e:
             raise Exception(f"Error deleting record from {table_name}: {e}")
 
     def query_records(self, table_name: str, filters=None):
         """
-        Queries records from the specified table based on filters.
+        Queries records from the specified table based on filters, serving
+        them from the cache or the local read replica when configured.
 
         Parameters:
             table_name (str): The name of the table.
@@ -133,16 +215,68 @@ class SupabaseModel:
         Returns:
             dict: The queried data from Supabase.
 
+        Raises:
+            Exception: If there is an error during the query.
+        """
+        generation = None
+        if self.cache is not None:
+            data = self.cache.get(table_name, filters)
+            if data is not None:
+                return data
+            # Change events arriving during the fetch make its rows stale
+            generation = self.cache.generation(table_name)
+        if self.replica is not None:
+            data = self.replica.query(table_name, filters)
+            if data is not None:
+                return data
+        data = self.fetch_records(table_name, filters)
+        if self.cache is not None:
+            self.cache.set(table_name, filters, data, generation)
+        return data
+
+    @profiled("query")
+    def fetch_records(self, table_name: str, filters=None, order_by: str = None, limit: int = None):
+        """
+        Queries records directly from Supabase, bypassing the cache and the replica.
+
+        Parameters:
+            table_name (str): The name of the table.
+            filters (dict): The filters to apply to the select query.
+            order_by (str): An optional column to sort by, ascending.
+            limit (int): An optional maximum number of rows.
+
+        Returns:
+            dict: The queried data from Supabase.
+
         Raises:
             Exception: If there is an error during the query.
         """
         try:
-            query = self.supabase.table(table_name).select("*")
-            response = self._apply_filters(query, filters).execute()
+            query = self._apply_filters(self.supabase.table(table_name).select("*"), filters)
+            if order_by:
+                query = query.order(order_by)
+            if limit:
+                query = query.limit(limit)
+            with upstream_call("supabase", f"query:{table_name}"):
+                response = query.execute()
             return self.parse_response(response)
         except Exception as e:
             raise Exception(f"Error querying records from {table_name}: {e}")
 
+    def _apply_locally(self, table_name: str, event_type: str, rows: list):
+        """
+        Applies rows returned by a write to the cache and the replica, so that reads
+        through this model see their own writes before a change feed or sync delivers them.
+        """
+        for local in (self.cache, self.replica):
+            if local is None:
+                continue
+            for row in rows or []:
+                if event_type == "DELETE":
+                    local.apply_change(table_name, event_type, {}, row)
+                else:
+                    local.apply_change(table_name, event_type, row)
+
     def _apply_filters(self, query, filters: dict):
         """
         Applies the given filters to a Supabase query.
@@ -159,8 +293,9 @@ class SupabaseModel:
         """
         if filters:
             for column, (operator, value) in filters.items():
-                if hasattr(query, operator):
-                    query = getattr(query, operator)(column, value)
+                method = _QUERY_METHODS.get(operator, operator)
+                if hasattr(query, method):
+                    query = getattr(query, method)(column, value)
                 else:
                     raise ValueError(f"Unsupported operator '{operator}' in filter for column '{column}'")
         return query
@@ -0,0 +1,88 @@
+import time
+import unittest
+from models.cache_model import QueryCacheModel
+
+
+class TestQueryCacheModel(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up a QueryCacheModel holding two cached customer queries.
+        """
+        self.cache = QueryCacheModel(ttl=60)
+        self.jane = {"customerid": 1, "customerfname": "Jane", "customerlname": "Doe"}
+        self.john = {"customerid": 2, "customerfname": "John", "customerlname": "Doe"}
+        self.cache.set("customers", None, [self.jane, self.john])
+        self.cache.set("customers", {"customerfname": ("eq", "Jane")}, [self.jane])
+
+    def test_get(self):
+        """
+        Test that cached queries are returned and unknown queries miss.
+        """
+        self.assertEqual(self.cache.get("customers"), [self.jane, self.john])
+        self.assertEqual(self.cache.get("customers", {"customerfname": ("eq", "Jane")}), [self.jane])
+        self.assertIsNone(self.cache.get("customers", {"customerid": ("eq", 1)}))
+        self.assertIsNone(self.cache.get("orders"))
+
+    def test_get_expired(self):
+        """
+        Test that entries are not served after the TTL.
+        """
+        cache = QueryCacheModel(ttl=0)
+        cache.set("customers", None, [self.jane])
+        time.sleep(0.001)
+        self.assertIsNone(cache.get("customers"))
+
+    def test_set_after_concurrent_change(self):
+        """
+        Test that rows fetched before a change event or invalidation are not cached.
+        """
+        for change in (lambda: self.cache.apply_change("orders", "UPDATE", {"orderid": 1}),
+                       lambda: self.cache.invalidate("orders"),
+                       lambda: self.cache.invalidate()):
+            generation = self.cache.generation("orders")
+            change()
+            self.cache.set("orders", None, [{"orderid": 1}], generation)
+            self.assertIsNone(self.cache.get("orders"))
+
+        generation = self.cache.generation("orders")
+        self.cache.apply_change("customers", "UPDATE", self.jane)
+        self.cache.set("orders", None, [{"orderid": 1}], generation)
+        self.assertEqual(self.cache.get("orders"), [{"orderid": 1}])
+
+    def test_apply_insert(self):
+        """
+        Test that inserted rows are added to the entries whose filters they match.
+        """
+        jane2 = {"customerid": 3, "customerfname": "Jane", "customerlname": "Smith"}
+        self.cache.apply_change("customers", "INSERT", jane2)
+        self.assertEqual(self.cache.get("customers"), [self.jane, self.john, jane2])
+        self.assertEqual(self.cache.get("customers", {"customerfname": ("eq", "Jane")}), [self.jane, jane2])
+
+    def test_apply_update(self):
+        """
+        Test that updated rows are replaced, and removed from entries they no longer match.
+        """
+        renamed = dict(self.jane, customerfname="Janet")
+        self.cache.apply_change("customers", "UPDATE", renamed, {"customerid": 1})
+        self.assertEqual(self.cache.get("customers"), [self.john, renamed])
+        self.assertEqual(self.cache.get("customers", {"customerfname": ("eq", "Jane")}), [])
+
+    def test_apply_delete(self):
+        """
+        Test that deleted rows are removed using the primary key of the old record.
+        """
+        self.cache.apply_change("customers", "DELETE", {}, {"customerid": 2})
+        self.assertEqual(self.cache.get("customers"), [self.jane])
+
+    def test_apply_change_unsupported_filter(self):
+        """
+        Test that entries with filters that cannot be evaluated locally are dropped.
+        """
+        self.cache.set("customers", {"customerlname": ("ilike", "%doe%")}, [self.jane, self.john])
+        self.cache.apply_change("customers", "INSERT", {"customerid": 3, "customerfname": "A", "customerlname": "Doe"})
+        self.assertIsNone(self.cache.get("customers", {"customerlname": ("ilike", "%doe%")}))
+        self.assertIsNotNone(self.cache.get("customers"))
+
+
+if __name__ == "__main__":
+    unittest.main()
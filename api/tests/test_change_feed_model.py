@@ -0,0 +1,74 @@
+import os
+import json
+import tempfile
+import unittest
+from models.cache_model import QueryCacheModel
+from models.change_feed_model import ChangeFeedModel, FileChangeFeedModel
+
+
+class TestFileChangeFeedModel(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up a cache with one cached query and a change feed replaying a temporary file.
+        """
+        self.cache = QueryCacheModel(ttl=60)
+        self.cache.set("customers", None, [{"customerid": 1, "customerfname": "Jane"}])
+        handle, self.path = tempfile.mkstemp(suffix=".jsonl")
+        os.close(handle)
+        self.change_feed = FileChangeFeedModel(self.path, [self.cache])
+
+    def tearDown(self):
+        self.change_feed.stop()
+        os.remove(self.path)
+
+    def write_events(self, *events):
+        with open(self.path, "a") as file:
+            for event in events:
+                file.write(json.dumps(event) + "\n")
+
+    def test_base_class_is_abstract(self):
+        """
+        Test that the base class cannot be instantiated without a _run implementation.
+        """
+        with self.assertRaises(TypeError):
+            ChangeFeedModel([])
+
+    def test_replay(self):
+        """
+        Test that events are replayed into the cache, and only new lines are replayed on later calls.
+        """
+        self.write_events(
+            {"table": "customers", "type": "INSERT", "record": {"customerid": 2, "customerfname": "John"}},
+            {"table": "customers", "type": "DELETE", "record": {}, "old_record": {"customerid": 1}},
+        )
+        self.assertEqual(self.change_feed.replay(), 2)
+        self.assertEqual(self.cache.get("customers"), [{"customerid": 2, "customerfname": "John"}])
+
+        self.write_events({"table": "customers", "type": "UPDATE", "record": {"customerid": 2, "customerfname": "Johnny"}})
+        self.assertEqual(self.change_feed.replay(), 1)
+        self.assertEqual(self.cache.get("customers"), [{"customerid": 2, "customerfname": "Johnny"}])
+
+    def test_replay_skips_malformed_and_partial_lines(self):
+        """
+        Test that malformed lines are skipped and partially written lines wait for the next replay.
+        """
+        with open(self.path, "a") as file:
+            file.write("not json\n")
+            file.write('{"table": "customers", "type": "DELETE", "old_record": {"customerid": 1}}')
+        self.assertEqual(self.change_feed.replay(), 0)
+        with open(self.path, "a") as file:
+            file.write("\n")
+        self.assertEqual(self.change_feed.replay(), 1)
+        self.assertEqual(self.cache.get("customers"), [])
+
+    def test_ignores_other_tables(self):
+        """
+        Test that events for tables the feed does not follow are ignored.
+        """
+        self.write_events({"table": "payments", "type": "INSERT", "record": {"id": 1}})
+        self.change_feed.replay()
+        self.assertEqual(len(self.cache.get("customers")), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
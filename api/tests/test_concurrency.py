@@ -0,0 +1,114 @@
+import time
+import asyncio
+import threading
+import unittest
+from functools import partial
+from helpers.concurrency import fan_out, afan_out
+from helpers.log import upstream_calls_var, upstream_call
+
+
+def slow(value, delay=0.1):
+    time.sleep(delay)
+    return value
+
+
+def fail():
+    raise ValueError("boom")
+
+
+class TestFanOut(unittest.TestCase):
+    def test_fan_out_runs_concurrently(self):
+        """
+        Test that calls run concurrently and results keep the order of the calls.
+        """
+        # Every call waits for the others to start, so calls run one at a time would break the barrier
+        barrier = threading.Barrier(3, timeout=5)
+
+        def meet(value):
+            barrier.wait()
+            return value
+
+        self.assertEqual(fan_out(partial(meet, 1), partial(meet, 2), partial(meet, 3)), [1, 2, 3])
+
+    def test_fan_out_raises_first_error(self):
+        """
+        Test that an error from any call is raised to the caller.
+        """
+        with self.assertRaises(ValueError):
+            fan_out(partial(slow, 1), fail)
+
+    def test_fan_out_timeout(self):
+        """
+        Test that per-call timeouts raise TimeoutError.
+        """
+        with self.assertRaises(TimeoutError):
+            fan_out(partial(slow, 1, 0.01), partial(slow, 2, 0.5), timeout=[1, 0.05])
+
+    def test_fan_out_return_exceptions(self):
+        """
+        Test that errors and timeouts are returned in place of results when asked to.
+        """
+        results = fan_out(partial(slow, 1, 0), fail, partial(slow, 3, 1), timeout=0.5, return_exceptions=True)
+        self.assertEqual(results[0], 1)
+        self.assertIsInstance(results[1], ValueError)
+        self.assertIsInstance(results[2], TimeoutError)
+
+    def test_fan_out_copies_context(self):
+        """
+        Test that upstream call timings made in the pool are recorded against the caller's request.
+        """
+        def call():
+            with upstream_call("supabase", "query:customers"):
+                return True
+
+        calls = []
+        token = upstream_calls_var.set(calls)
+        try:
+            fan_out(call, call)
+        finally:
+            upstream_calls_var.reset(token)
+        self.assertEqual(len(calls), 2)
+
+    def test_afan_out(self):
+        """
+        Test that afan_out runs sync callables and coroutine functions concurrently and gathers them in order.
+        """
+        sync_started, async_started = threading.Event(), threading.Event()
+
+        def sync():
+            sync_started.set()
+            return "sync" if async_started.wait(5) else "not concurrent"
+
+        async def coroutine():
+            async_started.set()
+            for _ in range(500):
+                if sync_started.is_set():
+                    return "async"
+                await asyncio.sleep(0.01)
+            return "not concurrent"
+
+        self.assertEqual(asyncio.run(afan_out(sync, coroutine)), ["sync", "async"])
+
+    def test_afan_out_timeout_cancels_remaining(self):
+        """
+        Test that a timeout in afan_out raises TimeoutError and cancels the other calls.
+        """
+        cancelled = []
+
+        async def waits():
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        async def main():
+            await afan_out(waits, partial(slow, 1, 0.5), timeout=[2, 0.05])
+
+        with self.assertRaises(TimeoutError):
+            asyncio.run(main())
+        self.assertEqual(cancelled, [True])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import time
+import unittest
+from models.delivery_report_model import DeliveryReportModel
+
+
+def report(message_id, status="Success"):
+    return {"messageid": message_id, "status": status}
+
+
+class TestDeliveryReportModel(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up a DeliveryReportModel writing to an in-memory stand-in for Supabase.
+        """
+        self.upserts = []
+        self.failing = False
+        self.model = DeliveryReportModel(self.upsert, batch_size=3, flush_interval=0.05, max_buffered=5)
+
+    def tearDown(self):
+        self.failing = False
+        self.model.stop()
+
+    def upsert(self, table_name, rows):
+        """
+        Stand-in for SupabaseModel.upsert_record.
+        """
+        if self.failing:
+            raise Exception(f"Error upserting record in {table_name}")
+        self.upserts.append((table_name, rows))
+        return rows
+
+    def test_flush_batches(self):
+        """
+        Test that reports are written in batches of at most batch_size.
+        """
+        for i in range(4):
+            self.assertTrue(self.model.add(report(f"ATXid_{i}")))
+        self.assertEqual(self.model.flush(), 3)
+        self.assertEqual(self.model.flush(), 1)
+        self.assertEqual(self.model.flush(), 0)
+        self.assertEqual([len(rows) for _, rows in self.upserts], [3, 1])
+        self.assertEqual(self.upserts[0][0], "sms_delivery_reports")
+
+    def test_flush_dedupes_messages(self):
+        """
+        Test that only the latest report per message is written from a batch.
+        """
+        self.model.add(report("ATXid_1", "Sent"))
+        self.model.add(report("ATXid_1", "Success"))
+        self.model.flush()
+        self.assertEqual(self.upserts[0][1], [report("ATXid_1", "Success")])
+
+    def test_full_buffer(self):
+        """
+        Test that reports beyond max_buffered are rejected and counted.
+        """
+        for i in range(5):
+            self.assertTrue(self.model.add(report(f"ATXid_{i}")))
+        self.assertFalse(self.model.add(report("ATXid_5")))
+        self.assertEqual(self.model.stats()["dropped"], 1)
+
+    def test_failed_flush_requeues(self):
+        """
+        Test that a batch that fails to write is retried in order.
+        """
+        for i in range(2):
+            self.model.add(report(f"ATXid_{i}"))
+        self.failing = True
+        with self.assertRaises(Exception):
+            self.model.flush()
+        self.assertEqual(self.model.stats()["buffered"], 2)
+        self.failing = False
+        self.model.flush()
+        self.assertEqual(self.upserts[0][1], [report("ATXid_0"), report("ATXid_1")])
+        stats = self.model.stats()
+        self.assertEqual((stats["written"], stats["failed_flushes"]), (2, 1))
+
+    def test_background_flush(self):
+        """
+        Test that the background thread writes buffered reports within the flush interval.
+        """
+        self.model.start()
+        self.model.add(report("ATXid_1"))
+        deadline = time.monotonic() + 2
+        while not self.upserts and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.upserts[0][1], [report("ATXid_1")])
+
+    def test_stop_flushes(self):
+        """
+        Test that stopping writes the reports still buffered.
+        """
+        self.model.start()
+        self.model.add(report("ATXid_1"))
+        self.model.stop()
+        self.assertEqual(self.model.stats()["written"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,5 @@
 import unittest
-from helpers.helpers import generate_africastalking_message
+from helpers.helpers import generate_africastalking_message, normalise_phone_number, detect_carrier, dedupe_recipients
 
 # Unit test case
 class TestHelpers(unittest.TestCase):
@@ -33,5 +33,45 @@ class TestHelpers(unittest.TestCase):
 
         self.assertIn('Missing key in order_data', str(context.exception))
 
+    def test_normalise_phone_number(self):
+        """
+        Test case for normalising Kenyan phone numbers in common formats to E.164.
+        """
+        for phone_number in [254712345678, '0712345678', '712345678', '+254 712 345 678', '00254712345678']:
+            self.assertEqual(normalise_phone_number(phone_number), '+254712345678')
+        self.assertEqual(normalise_phone_number('+1 (415) 555-2671'), '+14155552671')
+
+    def test_normalise_phone_number_invalid(self):
+        """
+        Test case to check that invalid phone numbers are rejected.
+        """
+        for phone_number in ['', '12345', '0612345678', 25471234567, '+2547123456789', 712345678.0, True, None]:
+            with self.assertRaises(ValueError):
+                normalise_phone_number(phone_number)
+
+    def test_detect_carrier(self):
+        """
+        Test case for detecting the carrier from a Kenyan number prefix.
+        """
+        self.assertEqual(detect_carrier('0712345678'), 'Safaricom')
+        self.assertEqual(detect_carrier('0733345678'), 'Airtel')
+        self.assertEqual(detect_carrier('0772345678'), 'Telkom')
+        self.assertEqual(detect_carrier('0112345678'), 'Safaricom')
+        self.assertIsNone(detect_carrier('+14155552671'))
+
+    def test_detect_carrier_unknown_prefix(self):
+        """
+        Test case to check that a Kenyan number with an unknown prefix is valid, with no carrier.
+        """
+        self.assertEqual(normalise_phone_number(254744449999), '+254744449999')
+        self.assertIsNone(detect_carrier(254744449999))
+
+    def test_dedupe_recipients(self):
+        """
+        Test case to check that repeated handsets are only sent to once per batch.
+        """
+        recipients = ['0712345678', '+254733345678', 254712345678, '712 345 678']
+        self.assertEqual(dedupe_recipients(recipients), ['+254712345678', '+254733345678'])
+
 if __name__ == '__main__':
     unittest.main()
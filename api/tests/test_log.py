@@ -0,0 +1,87 @@
+import io
+import json
+import logging
+import unittest
+from helpers.log import JsonFormatter, SamplingFilter, QueueStreamHandler, request_id_var, upstream_calls_var, upstream_call
+
+
+class TestLog(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up a logger writing JSON through a QueueStreamHandler into an in-memory stream.
+        """
+        self.stream = io.StringIO()
+        self.handler = QueueStreamHandler(stream=self.stream)
+        self.handler.setFormatter(JsonFormatter())
+        self.logger = logging.getLogger("tests.test_log")
+        self.logger.addHandler(self.handler)
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+
+    def tearDown(self):
+        self.logger.removeHandler(self.handler)
+        self.handler.close()
+
+    def read_records(self):
+        self.handler.flush()
+        return [json.loads(line) for line in self.stream.getvalue().splitlines()]
+
+    def test_json_records_include_request_id_and_extra(self):
+        """
+        Test that records are written as JSON with the request id and extra fields.
+        """
+        token = request_id_var.set("abc123")
+        try:
+            self.logger.info("GET %s", "/api/customers/", extra={"status_code": 200})
+        finally:
+            request_id_var.reset(token)
+
+        record = self.read_records()[0]
+        self.assertEqual(record["message"], "GET /api/customers/")
+        self.assertEqual(record["request_id"], "abc123")
+        self.assertEqual(record["status_code"], 200)
+
+    def test_exception_is_formatted(self):
+        """
+        Test that tracebacks are included in the JSON record.
+        """
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            self.logger.exception("Failed")
+
+        record = self.read_records()[0]
+        self.assertIn("ValueError: boom", record["exception"])
+
+    def test_sampling_filter(self):
+        """
+        Test that successful requests are sampled while errors are always kept.
+        """
+        sampling_filter = SamplingFilter(rate=0)
+        success = logging.makeLogRecord({"levelno": logging.INFO, "status_code": 200})
+        failure = logging.makeLogRecord({"levelno": logging.INFO, "status_code": 500})
+        error = logging.makeLogRecord({"levelno": logging.ERROR})
+        self.assertFalse(sampling_filter.filter(success))
+        self.assertTrue(sampling_filter.filter(failure))
+        self.assertTrue(sampling_filter.filter(error))
+        self.assertTrue(SamplingFilter(rate=1).filter(success))
+
+    def test_upstream_call_records_duration(self):
+        """
+        Test that upstream calls are recorded against the current request.
+        """
+        calls = []
+        token = upstream_calls_var.set(calls)
+        try:
+            with upstream_call("supabase", "query:customers"):
+                pass
+        finally:
+            upstream_calls_var.reset(token)
+
+        self.assertEqual(calls[0]["service"], "supabase")
+        self.assertEqual(calls[0]["operation"], "query:customers")
+        self.assertGreaterEqual(calls[0]["duration_ms"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import os
+import time
+import tempfile
+import unittest
+from models.profiler_model import ProfilerModel, filter_shape
+from models.supabase_model import profiled
+
+
+class StubSupabaseModel:
+    """
+    Stand-in for SupabaseModel with profiled methods that do not call Supabase.
+    """
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+
+    @profiled("insert")
+    def insert_record(self, table_name: str, payload: dict):
+        return [payload]
+
+    @profiled("query")
+    def fetch_records(self, table_name: str, filters=None, order_by: str = None, limit: int = None):
+        raise Exception(f"Error querying records from {table_name}")
+
+
+class TestProfilerModel(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up a ProfilerModel with a small ring buffer.
+        """
+        self.profiler = ProfilerModel(capacity=5)
+
+    def test_filter_shape(self):
+        """
+        Test that filter values are dropped and columns are sorted.
+        """
+        shape = filter_shape({"orderstatus": ("eq", "Complete"), "customerid": ("in", [1, 2])})
+        self.assertEqual(shape, "customerid=in&orderstatus=eq")
+        self.assertEqual(filter_shape(None), "")
+
+    def test_ring_buffer(self):
+        """
+        Test that only the most recent calls are kept.
+        """
+        for duration in range(8):
+            self.profiler.record("customers", "query", None, 1, 0, duration)
+        self.assertEqual([call["duration_ms"] for call in self.profiler.calls], [3, 4, 5, 6, 7])
+
+    def test_report(self):
+        """
+        Test that calls are grouped by table, operation and filter shape, slowest first.
+        """
+        self.profiler.record("customers", "query", {"customerid": ("eq", 1)}, 1, 0, 10)
+        self.profiler.record("customers", "query", {"customerid": ("eq", 2)}, 1, 0, 30)
+        self.profiler.record("orders", "insert", None, 1, 120, 5, error=True)
+        report = self.profiler.report()
+        self.assertEqual([(summary["table"], summary["filter_shape"]) for summary in report],
+                         [("customers", "customerid=eq"), ("orders", "")])
+        self.assertEqual(report[0]["count"], 2)
+        self.assertEqual(report[0]["avg_ms"], 20)
+        self.assertEqual(report[0]["max_ms"], 30)
+        self.assertEqual(report[1]["errors"], 1)
+        self.assertEqual(report[1]["avg_payload_bytes"], 120)
+        self.assertEqual(self.profiler.report(limit=1, order_by="count"), report[:1])
+
+    def test_report_invalid_order(self):
+        """
+        Test that an unknown ordering is rejected.
+        """
+        with self.assertRaises(ValueError):
+            self.profiler.report(order_by="duration")
+
+    def test_dump_and_load(self):
+        """
+        Test that profiles dumped by several processes are merged.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            self.profiler.record("customers", "query", None, 1, 0, 10)
+            self.profiler.dump(os.path.join(directory, "supabase-profile-1.json"))
+            other = ProfilerModel()
+            other.record("customers", "query", None, 3, 0, 20)
+            other.dump(os.path.join(directory, "supabase-profile-2.json"))
+            report = ProfilerModel.load([directory]).report()
+        self.assertEqual(report[0]["count"], 2)
+        self.assertEqual(report[0]["avg_rows"], 2)
+
+    def test_profiled_methods(self):
+        """
+        Test that profiled methods record rows, payload size and errors.
+        """
+        model = StubSupabaseModel(self.profiler)
+        model.insert_record("customers", payload={"customerfname": "Jane"})
+        with self.assertRaises(Exception):
+            model.fetch_records("orders", {"customerid": ("eq", 1)})
+        insert, query = self.profiler.calls
+        self.assertEqual((insert["operation"], insert["rows"], insert["error"]), ("insert", 1, False))
+        self.assertEqual(insert["payload_bytes"], len('{"customerfname": "Jane"}'))
+        self.assertEqual((query["operation"], query["filter_shape"], query["error"]), ("query", "customerid=eq", True))
+
+    def test_background_dump(self):
+        """
+        Test that the buffer is dumped by the background thread, not when calls are recorded.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            profiler = ProfilerModel(dump_dir=directory, dump_interval=0.01)
+            path = os.path.join(directory, f"supabase-profile-{os.getpid()}.json")
+            profiler.record("customers", "query", None, 1, 0, 10)
+            deadline = time.monotonic() + 2
+            while not os.path.exists(path) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            profiler.stop()
+            self.assertEqual(ProfilerModel.load([directory]).report()[0]["count"], 1)
+
+    def test_profiling_errors_do_not_fail_calls(self):
+        """
+        Test that a failing profiler does not change the result of the profiled method.
+        """
+        class BrokenProfiler:
+            def record(self, *args):
+                raise OSError("disk full")
+
+        self.assertEqual(StubSupabaseModel(BrokenProfiler()).insert_record("customers", {"customerid": 1}),
+                         [{"customerid": 1}])
+
+    def test_profiling_disabled(self):
+        """
+        Test that methods run unprofiled without a profiler.
+        """
+        self.assertEqual(StubSupabaseModel(None).insert_record("customers", {"customerid": 1}), [{"customerid": 1}])
+
+
+if __name__ == "__main__":
+    unittest.main()
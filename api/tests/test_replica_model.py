@@ -0,0 +1,143 @@
+import os
+import time
+import tempfile
+import unittest
+from models.replica_model import ReplicaModel
+
+
+class TestReplicaModel(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up a ReplicaModel syncing from an in-memory stand-in for Supabase.
+        """
+        self.customers = [
+            {"customerid": i, "customerfname": f"Name{i}", "customerphonee164": f"+2547000000{i:02d}"}
+            for i in range(1, 6)
+        ]
+        self.fetches = []
+        handle, self.path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(handle)
+        self.replica = ReplicaModel(self.fetch, self.path, tables=("customers",), batch_size=2)
+
+    def tearDown(self):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def fetch(self, table_name, filters=None, order_by=None, limit=None):
+        """
+        Stand-in for SupabaseModel.fetch_records supporting the 'gt' filter used by syncs.
+        """
+        self.fetches.append(filters)
+        rows = self.customers
+        if filters:
+            _, watermark = filters["customerid"]
+            rows = [row for row in rows if row["customerid"] > watermark]
+        rows = sorted(rows, key=lambda row: row[order_by])
+        return [dict(row) for row in rows[:limit]]
+
+    def test_query_before_sync(self):
+        """
+        Test that reads fall back to Supabase until the table has been synced.
+        """
+        self.assertIsNone(self.replica.query("customers"))
+
+    def test_full_and_incremental_sync(self):
+        """
+        Test that the first sync copies every row in pages, and later syncs only fetch rows above the watermark.
+        """
+        self.assertEqual(self.replica.sync("customers"), 5)
+        self.assertEqual(len(self.replica.query("customers")), 5)
+
+        self.customers.append({"customerid": 6, "customerfname": "Name6", "customerphonee164": "+254700000006"})
+        self.fetches.clear()
+        self.assertEqual(self.replica.sync("customers"), 1)
+        self.assertEqual(self.fetches[0], {"customerid": ("gt", 5)})
+        self.assertEqual(len(self.replica.query("customers")), 6)
+
+    def test_full_sync_drops_deleted_rows(self):
+        """
+        Test that a full sync removes rows deleted upstream.
+        """
+        self.replica.sync("customers")
+        del self.customers[0]
+        self.replica.sync("customers", full=True)
+        self.assertEqual([row["customerid"] for row in self.replica.query("customers")], [2, 3, 4, 5])
+
+    def test_query_filters(self):
+        """
+        Test that filters on the primary key, indexed columns and other columns are served locally.
+        """
+        self.replica.sync("customers")
+        self.assertEqual(self.replica.query("customers", {"customerid": ("eq", 2)})[0]["customerfname"], "Name2")
+        self.assertEqual(len(self.replica.query("customers", {"customerid": ("in", [1, 3])})), 2)
+        self.assertEqual(len(self.replica.query("customers", {"customerphonee164": ("eq", "+254700000004")})), 1)
+        self.assertEqual(len(self.replica.query("customers", {"customerfname": ("neq", "Name1")})), 4)
+        self.assertIsNone(self.replica.query("customers", {"customerid": ("eq", 99)}))
+        self.assertIsNone(self.replica.query("customers", {"customerfname": ("contains", "Name")}))
+
+    def test_query_stale(self):
+        """
+        Test that reads fall back to Supabase once the replica is older than the staleness bound.
+        """
+        self.replica.max_staleness = -1
+        self.replica.sync("customers")
+        self.assertIsNone(self.replica.query("customers"))
+
+    def test_apply_change_does_not_move_watermark(self):
+        """
+        Test that locally applied changes are served, without skipping rows at the next incremental sync.
+        """
+        self.replica.sync("customers")
+        self.replica.apply_change("customers", "INSERT", {"customerid": 10, "customerfname": "Local"})
+        self.replica.apply_change("customers", "DELETE", {}, {"customerid": 1})
+        self.assertEqual(self.replica.query("customers", {"customerid": ("eq", 10)})[0]["customerfname"], "Local")
+        self.assertIsNone(self.replica.query("customers", {"customerid": ("eq", 1)}))
+
+        self.customers.append({"customerid": 6, "customerfname": "Name6", "customerphonee164": "+254700000006"})
+        self.replica.sync("customers")
+        self.assertEqual(len(self.replica.query("customers", {"customerid": ("eq", 6)})), 1)
+
+    def test_full_sync_keeps_rows_applied_after_fetch(self):
+        """
+        Test that a full sync keeps rows applied locally above the fetched rows and the previous watermark.
+        """
+        self.replica.sync("customers")
+        self.replica.apply_change("customers", "INSERT", {"customerid": 10, "customerfname": "Local"})
+        self.replica.sync("customers", full=True)
+        self.assertEqual(len(self.replica.query("customers", {"customerid": ("eq", 10)})), 1)
+
+    def test_sync_lease(self):
+        """
+        Test that only one replica on a file holds the sync lease, until it is released or expires.
+        """
+        other = ReplicaModel(self.fetch, self.path, tables=("customers",), lease_timeout=0)
+        self.assertTrue(self.replica.acquire_lease())
+        self.assertFalse(other.acquire_lease())
+        self.replica.release_lease()
+        self.assertTrue(other.acquire_lease())
+        time.sleep(0.001)
+        self.assertTrue(self.replica.acquire_lease())
+
+    def test_readers_share_sync_state(self):
+        """
+        Test that replicas that do not sync serve rows synced by another process.
+        """
+        reader = ReplicaModel(self.fetch, self.path, tables=("customers",))
+        self.assertIsNone(reader.query("customers"))
+        self.replica.sync("customers")
+        self.assertEqual(len(reader.query("customers")), 5)
+        reader.invalidate("customers")
+        self.assertIsNone(self.replica.query("customers"))
+
+    def test_invalidate(self):
+        """
+        Test that invalidated tables fall back to Supabase until the next sync.
+        """
+        self.replica.sync("customers")
+        self.replica.invalidate("customers")
+        self.assertIsNone(self.replica.query("customers"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import os
+import unittest
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "api.settings")
+django.setup()
+
+from api.serializers import CustomerSerializer, OrderSerializer, DeliveryReportSerializer
+
+
+class TestSerializers(unittest.TestCase):
+    def test_customer_serializer(self):
+        """
+        Test that customer phone numbers are normalised and the computed columns are filled in.
+        """
+        serializer = CustomerSerializer(data={"customerfname": "Jane", "customerlname": "Doe", "customerphoneno": "0712345678"})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(dict(serializer.validated_data), {
+            "customerfname": "Jane",
+            "customerlname": "Doe",
+            "customerphoneno": 254712345678,
+            "customerphonee164": "+254712345678",
+            "customercarrier": "Safaricom",
+        })
+
+    def test_customer_serializer_rejects_invalid_payloads(self):
+        """
+        Test that missing fields, invalid or too long phone numbers and computed or unknown columns are rejected.
+        """
+        valid = {"customerfname": "Jane", "customerlname": "Doe", "customerphoneno": 254712345678}
+        for payload in [
+            {"customerfname": "Jane", "customerlname": "Doe"},
+            dict(valid, customerphoneno="12345"),
+            dict(valid, customerphoneno="+4915112345678"),
+            dict(valid, customerphonee164="+254700000000"),
+            dict(valid, customercarrier="Airtel"),
+            dict(valid, customerid=5),
+        ]:
+            self.assertFalse(CustomerSerializer(data=payload).is_valid(), payload)
+
+    def test_customer_serializer_partial(self):
+        """
+        Test that partial updates only validate the given columns.
+        """
+        serializer = CustomerSerializer(data={"customerlname": "Smith"}, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(dict(serializer.validated_data), {"customerlname": "Smith"})
+
+    def test_order_serializer(self):
+        """
+        Test that valid orders pass and order times are converted to ISO strings.
+        """
+        serializer = OrderSerializer(data={
+            "customerid": 1, "orderitem": "Boards", "orderamount": 10,
+            "orderstatus": "Incomplete", "ordertime": "2024-09-18T07:26:11Z",
+        })
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertIsInstance(serializer.validated_data["ordertime"], str)
+
+    def test_order_serializer_rejects_invalid_payloads(self):
+        """
+        Test that missing customerid, string amounts, unknown statuses and unknown columns are rejected.
+        """
+        valid = {"customerid": 1, "orderitem": "Boards", "orderamount": 10, "orderstatus": "Incomplete"}
+        for payload in [
+            {key: value for key, value in valid.items() if key != "customerid"},
+            dict(valid, orderamount="10"),
+            dict(valid, orderamount=True),
+            dict(valid, orderstatus="Shipped"),
+            dict(valid, discount=5),
+        ]:
+            self.assertFalse(OrderSerializer(data=payload).is_valid(), payload)
+
+    def test_order_serializer_many(self):
+        """
+        Test batch validation of order lists, reporting errors per row.
+        """
+        valid = {"customerid": 1, "orderitem": "Boards", "orderamount": 10, "orderstatus": "Incomplete"}
+        serializer = OrderSerializer(data=[valid, dict(valid, orderamount="10")], many=True)
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(serializer.errors[0], {})
+        self.assertIn("orderamount", serializer.errors[1])
+
+    def test_order_serializer_batch(self):
+        """
+        Test that a large batch is validated row by row, reporting errors against their index.
+        See benchmarks/bench_serializers.py for throughput.
+        """
+        rows = [{"customerid": i + 1, "orderitem": "Boards", "orderamount": 10, "orderstatus": "Incomplete"}
+                for i in range(2000)]
+        serializer = OrderSerializer(data=rows, many=True)
+        self.assertTrue(serializer.is_valid())
+        self.assertEqual(len(serializer.validated_data), 2000)
+
+        rows[1500]["orderamount"] = "10"
+        serializer = OrderSerializer(data=rows, many=True)
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("orderamount", serializer.errors[1500])
+
+    def test_delivery_report_serializer(self):
+        """
+        Test that Africa's Talking delivery reports are mapped to table rows and extra fields are ignored.
+        """
+        serializer = DeliveryReportSerializer(data={
+            "id": "ATXid_1", "status": "Failed", "phoneNumber": "+254712345678", "networkCode": "63902",
+            "failureReason": "AbsentSubscriber", "retryCount": "2", "cost": "KES 0.80",
+        })
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        report = dict(serializer.validated_data)
+        self.assertTrue(report.pop("reportedat"))
+        self.assertEqual(report, {
+            "messageid": "ATXid_1",
+            "status": "Failed",
+            "phonenumber": "+254712345678",
+            "networkcode": "63902",
+            "failurereason": "AbsentSubscriber",
+            "retrycount": 2,
+        })
+        self.assertFalse(DeliveryReportSerializer(data={"status": "Success"}).is_valid())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,230 @@
+import os
+import time
+import threading
+import unittest
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "api.settings")
+django.setup()
+
+from postgrest import SyncPostgrestClient
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory
+from api import views
+from api.views import CustomerView, OrderView, DeliveryReportView
+from models.supabase_model import SupabaseModel
+from models.delivery_report_model import DeliveryReportModel
+
+
+class StubSupabaseModel(SupabaseModel):
+    """
+    Stand-in for SupabaseModel that builds real postgrest queries, so filters
+    are checked, but keeps rows in memory instead of sending them to Supabase.
+    """
+
+    def __init__(self, customers):
+        self.cache = self.replica = self.profiler = None
+        self.supabase = SyncPostgrestClient("http://localhost")
+        self.customers = customers
+        self.inserts = []
+        self.updates = []
+
+    def insert_record(self, table_name: str, payload):
+        rows = payload if isinstance(payload, list) else [payload]
+        self.inserts.append((table_name, rows))
+        return [dict(row, orderid=index + 1) for index, row in enumerate(rows)]
+
+    def update_record(self, table_name: str, payload: dict, filters=None):
+        self.updates.append((table_name, payload, filters))
+        return [dict(payload, customerid=filters["customerid"][1])]
+
+    def fetch_records(self, table_name: str, filters=None, order_by: str = None, limit: int = None):
+        self._apply_filters(self.supabase.table(table_name).select("*"), filters)
+        operator, value = filters["customerid"]
+        ids = value if operator == "in" else [value]
+        return [customer for customer in self.customers if customer["customerid"] in ids]
+
+
+class StubAfricastalkingModel:
+    """
+    Stand-in for AfricastalkingModel recording the SMS sent.
+    """
+
+    def __init__(self):
+        self.sent = []
+        self.in_flight = self.max_in_flight = 0
+        self.lock = threading.Lock()
+        self.gateway_up = threading.Event()
+        self.gateway_up.set()
+
+    def send_sms(self, message: str, recipients: list) -> dict:
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            self.gateway_up.wait(5)
+            time.sleep(0.01)
+            self.sent.append(recipients)
+            return {"SMSMessageData": {"Recipients": recipients}}
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+class TestOrderView(unittest.TestCase):
+    def setUp(self):
+        """
+        Replace the Supabase and Africa's Talking models used by the views with stand-ins.
+        """
+        self.originals = views.supabase_model, views.africastalking_model
+        views.supabase_model = StubSupabaseModel([
+            {"customerid": 1, "customerfname": "Jane", "customerlname": "Doe",
+             "customerphoneno": 254712345678, "customerphonee164": "+254712345678"},
+            {"customerid": 2, "customerfname": "John", "customerlname": "Doe", "customerphoneno": 254744449999},
+        ])
+        views.africastalking_model = StubAfricastalkingModel()
+
+    def tearDown(self):
+        views.africastalking_model.gateway_up.set()
+        views.supabase_model, views.africastalking_model = self.originals
+
+    def post(self, data):
+        """
+        Calls OrderView.post directly, skipping the scope check.
+        """
+        view = OrderView()
+        request = view.initialize_request(APIRequestFactory().post("/api/orders/", data, format="json"))
+        view.request = request
+        return OrderView.post.__wrapped__(view, request)
+
+    def test_post_order_list(self):
+        """
+        Test that a list of orders is inserted in one call and every customer is notified.
+        """
+        orders = [
+            {"customerid": 1, "orderitem": "Boards", "orderamount": 10, "orderstatus": "Incomplete"},
+            {"customerid": 2, "orderitem": "Nails", "orderamount": 5, "orderstatus": "Incomplete"},
+        ]
+        response = self.post(orders)
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(len(views.supabase_model.inserts), 1)
+        self.assertEqual([order["recipients"] for order in response.data], [["+254712345678"], ["+254744449999"]])
+        self.assertCountEqual(views.africastalking_model.sent, [["+254712345678"], ["+254744449999"]])
+
+    @override_settings(ORDER_SMS_CONCURRENCY=2)
+    def test_post_order_list_limits_sms_in_flight(self):
+        """
+        Test that a bulk order sends at most ORDER_SMS_CONCURRENCY SMS at a time.
+        """
+        orders = [{"customerid": 1, "orderitem": "Boards", "orderamount": i, "orderstatus": "Incomplete"}
+                  for i in range(7)]
+        response = self.post(orders)
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(len(views.africastalking_model.sent), 7)
+        self.assertLessEqual(views.africastalking_model.max_in_flight, 2)
+        self.assertTrue(all(order["sms_sent"] for order in response.data))
+
+    @override_settings(ORDER_SMS_CONCURRENCY=2, UPSTREAM_CALL_TIMEOUT=0.05)
+    def test_post_order_list_reports_unsent_sms(self):
+        """
+        Test that SMS that time out or are skipped after a timeout are reported per order.
+        """
+        views.africastalking_model.gateway_up.clear()
+        orders = [{"customerid": 1, "orderitem": "Boards", "orderamount": i, "orderstatus": "Incomplete"}
+                  for i in range(3)]
+        response = self.post(orders)
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual([order["sms_sent"] for order in response.data], [False, False, False])
+        self.assertIn("did not finish", response.data[0]["sms_error"])
+        self.assertEqual(response.data[2]["sms_error"], "Not sent, the SMS gateway timed out.")
+        self.assertEqual(views.africastalking_model.max_in_flight, 2)
+
+    def test_post_order_unknown_customer(self):
+        """
+        Test that orders for unknown customers are rejected.
+        """
+        response = self.post([{"customerid": 3, "orderitem": "Boards", "orderamount": 10, "orderstatus": "Incomplete"}])
+        self.assertEqual(response.status_code, 400)
+
+
+class TestCustomerView(unittest.TestCase):
+    def setUp(self):
+        """
+        Replace the Supabase model used by the views with a stand-in.
+        """
+        self.original = views.supabase_model
+        views.supabase_model = StubSupabaseModel([])
+
+    def tearDown(self):
+        views.supabase_model = self.original
+
+    def patch(self, data):
+        """
+        Calls CustomerView.patch directly, skipping the scope check.
+        """
+        view = CustomerView()
+        request = view.initialize_request(APIRequestFactory().patch("/api/customers/", data, format="json"))
+        view.request = request
+        return CustomerView.patch.__wrapped__(view, request)
+
+    def test_patch_customer(self):
+        """
+        Test that a customer is updated by customerid.
+        """
+        response = self.patch({"customerid": 1, "customerfname": "Janet"})
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(views.supabase_model.updates, [("customers", {"customerfname": "Janet"}, {"customerid": ("eq", 1)})])
+
+    def test_patch_customer_invalid(self):
+        """
+        Test that invalid customer ids and empty updates are rejected without calling Supabase.
+        """
+        for data in ({"customerfname": "Janet"}, {"customerid": "abc", "customerfname": "Janet"},
+                     {"customerid": 0, "customerfname": "Janet"}, {"customerid": 1}):
+            self.assertEqual(self.patch(data).status_code, 400, data)
+        self.assertEqual(views.supabase_model.updates, [])
+
+
+class TestDeliveryReportView(unittest.TestCase):
+    def setUp(self):
+        """
+        Replace the delivery report buffer with one that is not flushed.
+        """
+        self.original = views.delivery_report_model
+        views.delivery_report_model = DeliveryReportModel(lambda table_name, rows: rows)
+        self.report = {"id": "ATXid_1", "status": "Success", "phoneNumber": "+254712345678"}
+
+    def tearDown(self):
+        views.delivery_report_model = self.original
+
+    def post(self, query=""):
+        return DeliveryReportView.as_view()(APIRequestFactory().post(f"/api/sms/callbacks/{query}", self.report))
+
+    @override_settings(DEBUG=False, SMS_CALLBACK_TOKEN="")
+    def test_rejected_without_token_configured(self):
+        """
+        Test that callbacks are rejected outside DEBUG when no token is configured.
+        """
+        self.assertEqual(self.post().status_code, 403)
+        self.assertEqual(views.delivery_report_model.stats()["received"], 0)
+
+    @override_settings(DEBUG=True, SMS_CALLBACK_TOKEN="")
+    def test_accepted_without_token_in_debug(self):
+        """
+        Test that callbacks are accepted without a token in DEBUG.
+        """
+        self.assertEqual(self.post().status_code, 200)
+
+    @override_settings(DEBUG=False, SMS_CALLBACK_TOKEN="s3cret")
+    def test_token(self):
+        """
+        Test that only callbacks carrying the configured token are buffered.
+        """
+        self.assertEqual(self.post().status_code, 403)
+        self.assertEqual(self.post("?token=wrong").status_code, 403)
+        self.assertEqual(self.post("?token=s3cret").status_code, 200)
+        self.assertEqual(views.delivery_report_model.stats()["received"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()